@@ -96,6 +96,182 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+_HASH_MASK_64 = (1 << 64) - 1
+
+_FNV_OFFSET_BASIS_64 = 0xcbf29ce484222325
+_FNV_PRIME_64 = 0x100000001b3
+
+
+def fnv1a_hash(key: str) -> int:
+    """64-bit FNV-1a hash of the UTF-8 encoding of key"""
+    hash = _FNV_OFFSET_BASIS_64
+    for byte in key.encode('utf-8'):
+        hash = ((hash ^ byte) * _FNV_PRIME_64) & _HASH_MASK_64
+    return hash
+
+
+def builtin_hash(key: str) -> int:
+    """
+    Python's built-in hash() reduced to a non-negative 64-bit value.
+    It is implemented in C and cached on str objects, so it is by far the
+    fastest option, but str hashes are randomized per process unless
+    PYTHONHASHSEED is set, so values must not be stored across runs.
+    """
+    return hash(key) & _HASH_MASK_64
+
+
+def _rotl64(value: int, shift: int) -> int:
+    """Rotate a 64-bit value left by shift bits."""
+    return ((value << shift) | (value >> (64 - shift))) & _HASH_MASK_64
+
+
+def _sip_round(v0: int, v1: int, v2: int, v3: int) -> tuple:
+    """One SipRound over the four 64-bit state words."""
+    v0 = (v0 + v1) & _HASH_MASK_64
+    v1 = _rotl64(v1, 13) ^ v0
+    v0 = _rotl64(v0, 32)
+    v2 = (v2 + v3) & _HASH_MASK_64
+    v3 = _rotl64(v3, 16) ^ v2
+    v0 = (v0 + v3) & _HASH_MASK_64
+    v3 = _rotl64(v3, 21) ^ v0
+    v2 = (v2 + v1) & _HASH_MASK_64
+    v1 = _rotl64(v1, 17) ^ v2
+    v2 = _rotl64(v2, 32)
+    return v0, v1, v2, v3
+
+
+def siphash24(data: bytes, k0: int, k1: int) -> int:
+    """SipHash-2-4 of data under the 128-bit key (k0, k1)"""
+    v0 = k0 ^ 0x736f6d6570736575
+    v1 = k1 ^ 0x646f72616e646f6d
+    v2 = k0 ^ 0x6c7967656e657261
+    v3 = k1 ^ 0x7465646279746573
+
+    length = len(data)
+    end = length - length % 8
+    for offset in range(0, end, 8):
+        m = int.from_bytes(data[offset:offset + 8], 'little')
+        v3 ^= m
+        v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+        v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+        v0 ^= m
+
+    m = int.from_bytes(data[end:], 'little') | ((length & 0xff) << 56)
+    v3 ^= m
+    v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+    v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+    v0 ^= m
+
+    v2 ^= 0xff
+    for _ in range(4):
+        v0, v1, v2, v3 = _sip_round(v0, v1, v2, v3)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def siphash_function(seed: int = 0) -> callable:
+    """
+    Return a keyed SipHash-2-4 hash function for use with either HashMap.
+    The 128-bit SipHash key is taken from seed, so different seeds give
+    independent hash functions and an outsider who does not know the seed
+    cannot pick keys that collide.
+    """
+    k0 = seed & _HASH_MASK_64
+    k1 = (seed >> 64) & _HASH_MASK_64
+
+    def siphash(key: str) -> int:
+        return siphash24(key.encode('utf-8'), k0, k1)
+
+    siphash.__name__ = f'siphash_{seed:x}'
+    return siphash
+
+
+def mix_hash(hash: int) -> int:
+    """
+    64-bit finalizer (MurmurHash3 fmix64) that spreads every input bit
+    over the low bits, so weak hash functions still index well when the
+    table is masked with a power-of-two capacity.
+    """
+    hash &= _HASH_MASK_64
+    hash ^= hash >> 33
+    hash = (hash * 0xff51afd7ed558ccd) & _HASH_MASK_64
+    hash ^= hash >> 33
+    hash = (hash * 0xc4ceb9fe1a85ec53) & _HASH_MASK_64
+    hash ^= hash >> 33
+    return hash
+
+
+def mixed_hash_function(function: callable) -> callable:
+    """Return a hash function that applies mix_hash to the result of function."""
+    def mixed(key: str) -> int:
+        return mix_hash(function(key))
+    mixed.__name__ = 'mixed_' + getattr(function, '__name__', 'hash')
+    return mixed
+
+
+def next_power_of_two(capacity: int) -> int:
+    """Return the smallest power of two >= capacity (and at least 2)."""
+    return max(2, 1 << (capacity - 1).bit_length())
+
+
+# Sieve of Eratosthenes shared by both HashMaps: _prime_flags[n] is 1 when
+# n is prime. It is grown on demand up to _PRIME_SIEVE_LIMIT so prime
+# capacities are found with a table lookup instead of trial division.
+_PRIME_SIEVE_LIMIT = 1 << 22
+_prime_flags = bytearray()
+
+
+def _extend_prime_sieve(limit: int) -> None:
+    """Rebuild the prime sieve so it covers every n < limit."""
+    global _prime_flags
+    flags = bytearray([1]) * limit
+    flags[0:2] = b'\x00\x00'
+    factor = 2
+    while factor * factor < limit:
+        if flags[factor]:
+            flags[factor * factor::factor] = bytes(len(range(factor * factor, limit, factor)))
+        factor += 1
+    _prime_flags = flags
+
+
+def is_prime(capacity: int) -> bool:
+    """Determine if given integer is a prime number and return boolean"""
+    if capacity < 2:
+        return False
+    if capacity >= len(_prime_flags) and capacity < _PRIME_SIEVE_LIMIT:
+        _extend_prime_sieve(min(_PRIME_SIEVE_LIMIT, max(1024, 2 * capacity)))
+    if capacity < len(_prime_flags):
+        return _prime_flags[capacity] == 1
+
+    # Beyond the sieve: fall back to trial division
+    if capacity % 2 == 0:
+        return False
+    factor = 3
+    while factor * factor <= capacity:
+        if capacity % factor == 0:
+            return False
+        factor += 2
+    return True
+
+
+def next_prime(capacity: int) -> int:
+    """
+    Return the smallest odd prime >= capacity, using the prime sieve
+    for table sizes it covers.
+    """
+    capacity = max(capacity, 3)
+    if capacity >= len(_prime_flags) and capacity < _PRIME_SIEVE_LIMIT:
+        _extend_prime_sieve(min(_PRIME_SIEVE_LIMIT, max(1024, 2 * capacity)))
+    index = _prime_flags.find(1, capacity)
+    if index >= 0:
+        return index
+
+    if capacity % 2 == 0:
+        capacity += 1
+    while not is_prime(capacity):
+        capacity += 2
+    return capacity
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +279,17 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash_code: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        hash_code caches the full (un-reduced) hash of the key so the
+        map never has to call the hash function on it again.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash_code = hash_code
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -141,7 +323,7 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, insert_node, remove, contains, length, iterator
     """
 
     def __init__(self) -> None:
@@ -168,20 +350,31 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
+    def insert(self, key: str, value: object, hash_code: int = None) -> None:
         """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+        self._head = SLNode(key, value, self._head, hash_code)
+        self._size += 1
+
+    def insert_node(self, node: SLNode) -> None:
+        """
+        Link an existing node in at the front of the list.
+        The node is reused as-is, so no new SLNode is allocated.
+        """
+        node.next = self._head
+        self._head = node
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash_code: int = None) -> bool:
         """
         Remove first node with matching key.
+        If hash_code is given, nodes with a different cached hash are
+        skipped without comparing keys.
         Return True if removal was successful, False otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash_code is None or node.hash_code == hash_code) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
@@ -192,11 +385,22 @@ class LinkedList:
             previous, node = node, node.next
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash_code: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If hash_code is given, it is compared before the (possibly
+        expensive) key comparison.
+        """
         node = self._head
+        if hash_code is None:
+            while node:
+                if node.key == key:
+                    return node
+                node = node.next
+            return node
+
         while node:
-            if node.key == key:
+            if node.hash_code == hash_code and node.key == key:
                 return node
             node = node.next
         return node
@@ -210,10 +414,14 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    def __init__(self, key: str, value: object, hash_code: int = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        hash_code caches the full (un-reduced) hash of the key.
+        """
         self.key = key
         self.value = value
+        self.hash_code = hash_code
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
@@ -0,0 +1,102 @@
+# Description: Multi-threaded throughput of the striped-lock HashMap against
+#              the chaining HashMap wrapped in one global lock. Every thread
+#              runs the same mix of get/put/remove calls on a shared,
+#              pre-filled map. On a GIL build of CPython only one thread
+#              executes bytecode at a time, so the gap mostly reflects lock
+#              hand-off; on a free-threaded build the stripes run in parallel.
+#
+# Run from the repository root:  python -m benchmarks.bench_concurrent
+
+import random
+import threading
+import time
+
+from a6_include import builtin_hash
+import hash_map_sc
+import hash_map_sc_concurrent
+
+
+class GlobalLockMap:
+    """The chaining HashMap with every call serialized through one lock."""
+
+    def __init__(self, capacity: int, function) -> None:
+        """Wrap a new chaining HashMap."""
+        self._map = hash_map_sc.HashMap(capacity, function)
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        """Update or add key/value pair under the global lock."""
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        """Return the value for key under the global lock."""
+        with self._lock:
+            return self._map.get(key)
+
+    def remove(self, key: str) -> None:
+        """Remove key under the global lock."""
+        with self._lock:
+            self._map.remove(key)
+
+
+def make_ops(seed: int, count: int, keys: list, read_fraction: float) -> list:
+    """Return a list of (op, key) pairs: reads, then puts and removes evenly."""
+    rng = random.Random(seed)
+    ops = []
+    for _ in range(count):
+        key = rng.choice(keys)
+        r = rng.random()
+        if r < read_fraction:
+            ops.append(('get', key))
+        elif r < (1 + read_fraction) / 2:
+            ops.append(('put', key))
+        else:
+            ops.append(('remove', key))
+    return ops
+
+
+def run(m, threads: int, ops_per_thread: int, keys: list, read_fraction: float) -> float:
+    """Run the workload on m with the given thread count and return ops/sec."""
+    workloads = [make_ops(t, ops_per_thread, keys, read_fraction) for t in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(ops: list) -> None:
+        get, put, remove = m.get, m.put, m.remove
+        barrier.wait()
+        for op, key in ops:
+            if op == 'get':
+                get(key)
+            elif op == 'put':
+                put(key, 1)
+            else:
+                remove(key)
+
+    workers = [threading.Thread(target=worker, args=(ops,)) for ops in workloads]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return threads * ops_per_thread / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+
+  n_keys = 100_000
+  ops_per_thread = 100_000
+  read_fraction = 0.8
+  keys = ['str' + str(i) for i in range(n_keys)]
+
+  print(f"{n_keys} keys, {ops_per_thread} ops per thread, {read_fraction:.0%} reads\n")
+  print(f"{'threads':>8}{'global lock ops/s':>20}{'striped ops/s':>16}{'ratio':>8}")
+  for threads in (1, 2, 4, 8):
+    results = []
+    for make in (lambda: GlobalLockMap(11, builtin_hash),
+                 lambda: hash_map_sc_concurrent.HashMap(11, builtin_hash)):
+      m = make()
+      for key in keys:
+        m.put(key, 0)
+      results.append(run(m, threads, ops_per_thread, keys, read_fraction))
+    print(f"{threads:>8}{results[0]:>20,.0f}{results[1]:>16,.0f}{results[1] / results[0]:>8.2f}")
@@ -0,0 +1,71 @@
+# Description: Compare the hash functions in a6_include on realistic key
+#              sets: how evenly they spread keys over the buckets of a
+#              prime and a power-of-two table, and how long they take.
+#
+# Run from the repository root:  python -m benchmarks.bench_hash_distribution
+
+import itertools
+import random
+import time
+
+from a6_include import (builtin_hash, fnv1a_hash, hash_function_1,
+                        hash_function_2, next_prime, siphash_function)
+
+HASH_FUNCTIONS = (
+    hash_function_1,
+    hash_function_2,
+    fnv1a_hash,
+    siphash_function(0x0123456789abcdef),
+    builtin_hash,
+)
+
+
+def key_sets(n: int) -> dict:
+    """Return named lists of n keys shaped like the keys seen in practice."""
+    rnd = random.Random(261)
+    letters = 'abcdefghij'
+    return {
+        'sequential ids': ['str' + str(i) for i in range(n)],
+        'padded ids': [f'user:{i:08d}' for i in range(n)],
+        'permutations': [''.join(p) for p in itertools.islice(itertools.permutations(letters), n)],
+        'random hex': [f'{rnd.getrandbits(64):016x}' for _ in range(n)],
+    }
+
+
+def chi_square(counts: list, n: int) -> float:
+    """
+    Return chi-square divided by its degrees of freedom for bucket counts
+    against the uniform distribution: ~1.0 is ideal, much larger is clumping.
+    """
+    expected = n / len(counts)
+    return sum((c - expected) ** 2 for c in counts) / expected / (len(counts) - 1)
+
+
+def distribution(function, keys: list, capacity: int) -> tuple[float, int, int]:
+    """Return (chi-square / dof, largest bucket, empty buckets) for one table size."""
+    counts = [0] * capacity
+    for key in keys:
+        counts[function(key) % capacity] += 1
+    return chi_square(counts, len(keys)), max(counts), counts.count(0)
+
+
+if __name__ == "__main__":
+
+  n = 20_000
+  prime = next_prime(n)
+  power = 1 << (n - 1).bit_length()
+  print(f"{n} keys; prime table {prime}, power-of-two table {power}\n")
+  print(f"{'keys':<16}{'function':<28}{'ns/key':>8}"
+        f"{'chi2 p':>10}{'max p':>7}{'chi2 2^k':>10}{'max 2^k':>9}")
+  for set_name, keys in key_sets(n).items():
+    for function in HASH_FUNCTIONS:
+      start = time.perf_counter()
+      for key in keys:
+        function(key)
+      ns = (time.perf_counter() - start) / n * 1e9
+
+      chi_p, max_p, _ = distribution(function, keys, prime)
+      chi_2, max_2, _ = distribution(function, keys, power)
+      print(f"{set_name:<16}{function.__name__:<28}{ns:>8.0f}"
+            f"{chi_p:>10.2f}{max_p:>7}{chi_2:>10.2f}{max_2:>9}")
+    print()
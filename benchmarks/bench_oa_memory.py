@@ -0,0 +1,35 @@
+# Description: Compare peak memory and lookup time of the HashEntry-based
+#              open addressing map against the struct-of-arrays backend.
+#
+# Run from the repository root:  python -m benchmarks.bench_oa_memory
+
+import time
+import tracemalloc
+
+from a6_include import hash_function_2
+import hash_map_oa
+import hash_map_oa_compact
+
+
+def measure(module, n: int) -> tuple[float, float]:
+    """Return (peak MiB while building, seconds for n lookups) for one backend."""
+    tracemalloc.start()
+    m = module.HashMap(11, hash_function_2)
+    for i in range(n):
+        m.put('str' + str(i), i)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(n):
+        m.get('str' + str(i))
+    return peak, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+
+  print(f"{'backend':<22}{'keys':>10}{'peak MiB':>12}{'get (s)':>10}")
+  for n in (5_000, 20_000):
+    for module in (hash_map_oa, hash_map_oa_compact):
+      peak, seconds = measure(module, n)
+      print(f"{module.__name__:<22}{n:>10}{peak:>12.2f}{seconds:>10.4f}")
@@ -0,0 +1,49 @@
+# Description: Compare HashMap.resize_table in the open addressing map
+#              against the previous rebuild-through-put approach.
+#
+# Run from the repository root:  python -m benchmarks.bench_oa_resize
+
+import time
+
+from a6_include import hash_function_1, hash_function_2
+from hash_map_oa import HashMap
+
+
+def build_map(n: int, function) -> HashMap:
+    """Return an OA HashMap holding n keys of the form 'str<i>'."""
+    m = HashMap(11, function)
+    for i in range(n):
+        m.put('str' + str(i), i)
+    return m
+
+
+def resize_by_put(m: HashMap, new_capacity: int) -> HashMap:
+    """Previous resize path: re-insert every live entry through put()."""
+    new_table = HashMap(new_capacity, m._hash_function)
+    for entry in m:
+        new_table.put(entry.key, entry.value)
+    return new_table
+
+
+def best_of(repeats: int, func) -> float:
+    """Return the fastest wall-clock time of func() over several runs."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+
+  print(f"{'function':<16}{'keys':>10}{'put path (s)':>16}{'rehash (s)':>14}{'speedup':>10}")
+  for function in (hash_function_1, hash_function_2):
+    for n in (1_000, 5_000, 20_000):
+      m = build_map(n, function)
+      new_capacity = 4 * m.get_capacity()
+
+      old_time = best_of(3, lambda: resize_by_put(m, new_capacity))
+      new_time = best_of(3, lambda: m.resize_table(new_capacity))
+      print(f"{function.__name__:<16}{n:>10}{old_time:>16.4f}{new_time:>14.4f}"
+            f"{old_time / new_time:>9.1f}x")
@@ -0,0 +1,58 @@
+# Description: Per-call put() latency percentiles for both HashMaps, with
+#              and without progressive rehashing. With synchronous resizing
+#              the worst put grows with the table; with progressive
+#              rehashing it stays bounded by rehash_step plus allocating the
+#              new array. That bound is paid for in the tail: every put made
+#              while a migration is running also moves rehash_step buckets
+#              or slots, and migrations run for a quarter (chaining) or an
+#              eighth (open addressing) of all puts, so p99 is several times
+#              the synchronous p99 even though p50 barely moves.
+#              The cyclic garbage collector is paused while timing, since
+#              its full collections would otherwise swamp the resize pauses.
+#
+# Run from the repository root:  python -m benchmarks.bench_put_latency
+
+import gc
+import time
+
+from a6_include import builtin_hash
+import hash_map_oa
+import hash_map_sc
+
+
+def put_latencies(m, n: int) -> list:
+    """Insert n fresh keys into m and return each put's latency in microseconds."""
+    keys = ['str' + str(i) for i in range(n)]
+    latencies = []
+    clock = time.perf_counter_ns
+    gc.disable()
+    try:
+        for i, key in enumerate(keys):
+            start = clock()
+            m.put(key, i)
+            latencies.append((clock() - start) / 1000)
+    finally:
+        gc.enable()
+    return latencies
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Return the value at the given fraction of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+if __name__ == "__main__":
+
+  n = 200_000
+  print(f"{n} puts, latency in microseconds\n")
+  print(f"{'map':<14}{'mode':<14}{'p50':>8}{'p99':>8}{'p99.9':>9}{'max':>11}{'total s':>9}")
+  for module in (hash_map_sc, hash_map_oa):
+    for progressive in (False, True):
+      m = module.HashMap(11, builtin_hash, progressive=progressive)
+      latencies = put_latencies(m, n)
+      total = sum(latencies) / 1e6
+      latencies.sort()
+      mode = 'progressive' if progressive else 'synchronous'
+      print(f"{module.__name__:<14}{mode:<14}{percentile(latencies, 0.5):>8.1f}"
+            f"{percentile(latencies, 0.99):>8.1f}{percentile(latencies, 0.999):>9.1f}"
+            f"{latencies[-1]:>11.1f}{total:>9.2f}")
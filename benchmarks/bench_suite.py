@@ -0,0 +1,309 @@
+# Description: Reproducible benchmark suite for the chaining and open
+#              addressing HashMaps, with the builtin dict as a baseline.
+#              Runs insert-heavy, read-heavy, miss-heavy, churn and counting
+#              (find_mode's increment loop) workloads over a sweep of key
+#              counts, key shapes, hash functions and initial capacities,
+#              and prints one JSON document with ops/sec, p50/p99 latency
+#              and peak traced memory for every combination.
+#
+#              Every workload is generated from a fixed seed, so two runs
+#              differ only in timing. Each combination is run three times on
+#              a fresh map: once untimed per call for throughput, once timing
+#              every call for the latency percentiles, and once under
+#              tracemalloc for peak memory. The cyclic garbage collector is
+#              paused while timing. dict is driven through the same
+#              put/get/remove/increment method names as the maps, so its
+#              numbers include one extra Python call per operation.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_suite > results.json
+#   python -m benchmarks.bench_suite --keys 1000 100000 --functions fnv1a_hash \
+#       --capacities 11 auto --output results.json
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from a6_include import builtin_hash, fnv1a_hash, hash_function_1, hash_function_2
+import hash_map_oa
+import hash_map_sc
+
+HASH_FUNCTIONS = {
+    function.__name__: function
+    for function in (hash_function_1, hash_function_2, fnv1a_hash, builtin_hash)
+}
+
+# Operation codes in a generated workload
+PUT, GET, REMOVE, INCREMENT = range(4)
+
+
+class DictMap:
+    """The builtin dict behind the HashMap method names the suite calls."""
+
+    def __init__(self) -> None:
+        """Start with an empty dict."""
+        self._data = {}
+
+    def put(self, key: str, value: object) -> None:
+        """Update or add key/value pair."""
+        self._data[key] = value
+
+    def get(self, key: str) -> object:
+        """Return the value for key, or None."""
+        return self._data.get(key)
+
+    def remove(self, key: str) -> None:
+        """Remove key if it is present."""
+        self._data.pop(key, None)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """Add delta to the count for key and return the new count."""
+        data = self._data
+        count = data[key] = data.get(key, 0) + delta
+        return count
+
+
+def make_keys(shape: str, n: int, rng: random.Random) -> list:
+    """Return n distinct keys of the given shape."""
+    if shape == 'sequential':
+        return ['str' + str(i) for i in range(n)]
+    if shape == 'padded':
+        return [f'user:{i:08d}' for i in range(n)]
+    if shape == 'random':
+        # Deduplicate in generation order: iterating a set of str follows
+        # the per-process hash seed and would change the keys every run
+        keys, seen = [], set()
+        while len(keys) < n:
+            key = f'{rng.getrandbits(64):016x}'
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+        return keys
+    if shape == 'path':
+        return [f'/api/v2/accounts/{i % 97}/sessions/{i}/events' for i in range(n)]
+    raise ValueError(f"unknown key shape {shape!r}")
+
+
+KEY_SHAPES = ('sequential', 'padded', 'random', 'path')
+
+
+def make_workload(workload: str, keys: list, misses: list, rng: random.Random) -> tuple:
+    """
+    Return (setup, ops) for a workload over keys: setup is the list of keys
+    put into the map before timing starts, ops the timed (op, key) pairs.
+    """
+    n = len(keys)
+    if workload == 'insert':
+        return [], [(PUT, key) for key in keys]
+    if workload == 'read':
+        return keys, [(GET, rng.choice(keys)) for _ in range(n)]
+    if workload == 'miss':
+        return keys, [(GET, rng.choice(misses)) for _ in range(n)]
+    if workload == 'churn':
+        # Sliding window: remove the oldest key, add a new one
+        half = n // 2
+        ops = []
+        for i in range(half):
+            ops.append((REMOVE, keys[i]))
+            ops.append((PUT, keys[half + i]))
+        return keys[:half], ops
+    if workload == 'count':
+        # Skewed token stream over a tenth of the keys, counted the way
+        # find_mode does: one increment per token plus a running maximum
+        vocabulary = keys[:max(1, n // 10)]
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        return [], [(INCREMENT, key) for key in rng.choices(vocabulary, weights, k=n)]
+    raise ValueError(f"unknown workload {workload!r}")
+
+
+WORKLOADS = ('insert', 'read', 'miss', 'churn', 'count')
+
+
+def execute(m, ops: list) -> int:
+    """Run ops against m and return the highest count seen by increments."""
+    put, get, remove, increment = m.put, m.get, m.remove, m.increment
+    top = 0
+    for op, key in ops:
+        if op == GET:
+            get(key)
+        elif op == PUT:
+            put(key, key)
+        elif op == REMOVE:
+            remove(key)
+        else:
+            count = increment(key)
+            if count > top:
+                top = count
+    return top
+
+
+def execute_timed(m, ops: list) -> list:
+    """Run ops against m and return every call's latency in nanoseconds."""
+    calls = {PUT: lambda key: m.put(key, key), GET: m.get,
+             REMOVE: m.remove, INCREMENT: m.increment}
+    clock = time.perf_counter_ns
+    latencies = []
+    for op, key in ops:
+        call = calls[op]
+        start = clock()
+        call(key)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def prepared(make, setup: list):
+    """Return a new map from make() holding every key in setup."""
+    m = make()
+    for key in setup:
+        m.put(key, key)
+    return m
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Return the value at the given fraction of an already sorted list."""
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(make, setup: list, ops: list) -> dict:
+    """Return throughput, latency and peak memory of ops on fresh maps from make()."""
+    gc.collect()
+    gc.disable()
+    try:
+        m = prepared(make, setup)
+        start = time.perf_counter()
+        execute(m, ops)
+        seconds = time.perf_counter() - start
+
+        m = prepared(make, setup)
+        latencies = sorted(execute_timed(m, ops))
+    finally:
+        gc.enable()
+    del m
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        m = prepared(make, setup)
+        execute(m, ops)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ops': len(ops),
+        'seconds': seconds,
+        'ops_per_sec': len(ops) / seconds if seconds else None,
+        'p50_us': percentile(latencies, 0.50) / 1000,
+        'p99_us': percentile(latencies, 0.99) / 1000,
+        'peak_bytes': peak,
+    }
+
+
+def implementations(function, capacity: int, reserve: int = None) -> dict:
+    """
+    Return map factories by name for one hash function and initial
+    capacity. With reserve, each map is instead built at the default
+    capacity and then reserve()d for that many keys under its own load
+    limit, so neither map resizes while the keys go in.
+    """
+    def factory(module):
+        def make():
+            m = module.HashMap(capacity, function)
+            if reserve is not None:
+                m.reserve(reserve)
+            return m
+        return make
+
+    return {
+        'hash_map_sc': factory(hash_map_sc),
+        'hash_map_oa': factory(hash_map_oa),
+    }
+
+
+def run_suite(key_counts: list, shapes: list, functions: list, capacities: list,
+              workloads: list, seed: int) -> list:
+    """Run every combination and return one result dict per run."""
+    results = []
+    for n in key_counts:
+        for shape in shapes:
+            rng = random.Random(f'{seed}/{n}/{shape}')
+            generated = make_keys(shape, 2 * n, rng)
+            keys, misses = generated[:n], generated[n:]
+            for workload in workloads:
+                setup, ops = make_workload(workload, keys, misses,
+                                           random.Random(f'{seed}/{n}/{shape}/{workload}'))
+                base = {'workload': workload, 'keys': n, 'shape': shape}
+
+                results.append({'map': 'dict', 'function': None, 'capacity': None,
+                                **base, **measure(DictMap, setup, ops)})
+                for function_name in functions:
+                    function = HASH_FUNCTIONS[function_name]
+                    for capacity in capacities:
+                        if capacity == 'auto':
+                            makers = implementations(function, 11, reserve=n)
+                        else:
+                            capacity = int(capacity)
+                            makers = implementations(function, capacity)
+                        for name, make in makers.items():
+                            results.append({'map': name, 'function': function_name,
+                                            'capacity': capacity, **base,
+                                            **measure(make, setup, ops)})
+                            print(f"{name:<12} {workload:<7} {n:>8} {shape:<10} "
+                                  f"{function_name:<16} {capacity:>8} "
+                                  f"{results[-1]['ops_per_sec']:>12,.0f} ops/s",
+                                  file=sys.stderr)
+    return results
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """Return the command line options of the suite."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the SC and OA HashMaps against dict and print JSON.')
+    parser.add_argument('--keys', type=int, nargs='+', default=[1_000, 10_000],
+                        help='key counts to sweep')
+    parser.add_argument('--shapes', nargs='+', choices=KEY_SHAPES,
+                        default=['sequential', 'random'], help='key shapes to sweep')
+    parser.add_argument('--functions', nargs='+', choices=sorted(HASH_FUNCTIONS),
+                        default=['hash_function_2', 'fnv1a_hash'],
+                        help='hash functions to sweep')
+    parser.add_argument('--capacities', nargs='+', default=['11', 'auto'],
+                        help="initial capacities to sweep; 'auto' reserve()s room for "
+                             "the key count under each map's load limit")
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS,
+                        default=list(WORKLOADS), help='workloads to run')
+    parser.add_argument('--seed', type=int, default=261, help='workload seed')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+
+  args = parse_args()
+  document = {
+    'meta': {
+      'python': sys.version,
+      'implementation': platform.python_implementation(),
+      'platform': platform.platform(),
+      'seed': args.seed,
+      'keys': args.keys,
+      'shapes': args.shapes,
+      'functions': args.functions,
+      'capacities': args.capacities,
+      'workloads': args.workloads,
+    },
+    'results': run_suite(args.keys, args.shapes, args.functions, args.capacities,
+                         args.workloads, args.seed),
+  }
+  if args.output:
+    with open(args.output, 'w') as file:
+      json.dump(document, file, indent=2)
+  else:
+    json.dump(document, sys.stdout, indent=2)
+    print()
@@ -5,22 +5,105 @@
 # Due Date: 08/15/23
 # Description: Hash Map Implementation - Open Addressing using Dynamic Array and HashEntry
 
+import time
+from array import array
+from itertools import islice
+
 from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+                        hash_function_1, hash_function_2, is_prime,
+                        mixed_hash_function, next_power_of_two, next_prime)
+from probing import (PROBE_STRATEGIES, LinearProbe, ProbeStrategy, QuadraticProbe,
+                     TriangularProbe)
+from snapshot import (check_hashes, function_identity, gc_paused, read_snapshot,
+                      resolve_hash_function, write_snapshot)
+import tracing
+
+# Left behind in the old slot array when progressive rehashing moves an
+# entry out, so probe sequences through that slot keep going. Also stands
+# in for the tombstones of a table restored from a snapshot.
+_MOVED = HashEntry(None, None)
+_MOVED.is_tombstone = True
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function,
+                 tombstone_threshold: float = 0.25,
+                 robin_hood: bool = False,
+                 probe: ProbeStrategy = None,
+                 power_of_two: bool = False,
+                 shrink_load: float = None,
+                 progressive: bool = False,
+                 rehash_step: int = 16) -> None:
         """
-        Initialize new HashMap that uses
-        quadratic probing for collision resolution
+        Initialize new HashMap that uses open addressing for collision
+        resolution. probe selects the probe sequence (see probing.py) and
+        defaults to quadratic probing (triangular with power_of_two=True).
+        Once tombstones take up more than tombstone_threshold of the
+        slots, the table is compacted in place at the same capacity.
+        With robin_hood=True the map instead uses Robin Hood linear
+        probing with backward-shift deletion, which never leaves tombstones.
+        With power_of_two=True capacities are powers of two, home slots are
+        picked with a bit mask instead of %, and hash codes are passed
+        through mix_hash so weak hash functions still spread out.
+        If shrink_load is given, remove() shrinks the table back to a 0.25
+        load once the load drops below shrink_load, but never below the
+        initial or reserved capacity. It must be under 0.125 so a table
+        that just shrank cannot immediately grow or shrink again.
+        With progressive=True, growth triggered by put() is spread out: the
+        old and new slot arrays coexist and every put/get/contains_key/remove
+        moves rehash_step old slots across until the old array is empty.
+        This bounds the worst put but raises the typical cost of every call
+        made during a migration, so p99 put latency goes up (see
+        benchmarks/bench_put_latency.py). Progressive rehashing is not
+        available in Robin Hood mode.
         """
-        self._buckets = DynamicArray()
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        if shrink_load is not None and not 0 <= shrink_load < 0.125:
+            raise ValueError("shrink_load must be in [0, 0.125)")
+        if progressive and robin_hood:
+            raise ValueError("progressive rehashing is not supported in Robin Hood mode")
+        if probe is None:
+            if robin_hood:
+                probe = LinearProbe()
+            else:
+                probe = TriangularProbe() if power_of_two else QuadraticProbe()
+        elif robin_hood and not isinstance(probe, LinearProbe):
+            raise ValueError("Robin Hood mode requires linear probing")
+
+        self._power_of_two = power_of_two
+        self._capacity = self._next_capacity(capacity)
+        if probe.coverage(self._capacity) <= self._capacity // 2:
+            raise ValueError(f"{probe!r} cannot reach enough slots in a table "
+                             f"of capacity {self._capacity}")
+        self._min_capacity = self._capacity
+        self._shrink_load = shrink_load
+        self._mask = self._capacity - 1
+        self._buckets = DynamicArray([None] * self._capacity)
         self._hash_function = function
+        self._hash = mixed_hash_function(function) if power_of_two else function
         self._size = 0
+        self._tombstones = 0
+        self._tombstone_threshold = tombstone_threshold
+        self._robin_hood = robin_hood
+        self._probe = probe
+        # _probe_histogram[d] is the number of live entries in the current
+        # slot array that sit d probes past their home slot
+        self._probe_histogram = []
+        self._resize_count = 0
+        self._compaction_count = 0
+        self._resize_seconds = 0.0
+        # Bumped by every insert, remove and rehash so that lazy views can
+        # tell the map changed underneath them
+        self._mod_count = 0
+
+        # Progressive rehashing: slots below _migrate_index of the old
+        # array have already been moved, _old_live entries remain there
+        self._progressive = progressive
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._old_mask = 0
+        self._migrate_index = 0
+        self._old_live = 0
 
     def __str__(self) -> str:
         """
@@ -31,31 +114,26 @@ class HashMap:
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
         return out
 
+    def _next_capacity(self, capacity: int) -> int:
+        """
+        Round a requested capacity up to the next one allowed by the map's mode
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        return self._next_prime(capacity)
+
     def _next_prime(self, capacity: int) -> int:
         """
         Increment from given number to find the closest prime number
         """
-        if capacity % 2 == 0:
-            capacity += 1
-        while not self._is_prime(capacity):
-            capacity += 2
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
         """
-        if capacity == 2 or capacity == 3:
-            return True
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-        return True
+        return is_prime(capacity)
 
     def get_size(self) -> int:
         """
@@ -73,38 +151,251 @@ class HashMap:
         """
         Updates the key/value pair in the hash map. If the key exists, replace its value.
         """
+        self._prepare_insert()
+        self._put_hashed(key, value, self._hash(key))
+
+    def _prepare_insert(self) -> None:
+        """
+        Advance any progressive rehash and grow a half-full table, as every
+        call that may add a key does before hashing it
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
         if self.table_load() >= 0.5:
-            self.resize_table(2 * self._capacity)
+            if self._progressive:
+                self._start_migration(2 * self._capacity)
+            else:
+                self.resize_table(2 * self._capacity)
 
-        hash_index = self._hash_function(key) % self._capacity
+    def _put_hashed(self, key: str, value: object, hash_code: int) -> None:
+        """
+        Update or add a key/value pair whose hash code is already known
+        """
+        entry, index, distance = self._locate(key, hash_code)
+        if entry is not None:
+            entry.value = value
+        else:
+            self._insert_at(index, distance, HashEntry(key, value, hash_code))
+
+    def _locate(self, key: str, hash_code: int) -> tuple:
+        """
+        Return (entry, index, distance) for key. entry is the live HashEntry
+        holding key, from either array during a progressive rehash, or None.
+        When it is None, index is the slot a new entry for key belongs in
+        and distance the number of probes past the home slot to reach it.
+        A single probe pass remembers the first tombstone it meets and keeps
+        going until it finds the key or an empty slot, so a key is never
+        stored twice along its probe sequence. If the probe sequence runs
+        out without a free slot the table grows and the search is repeated.
+        """
+        if self._robin_hood:
+            return self._rh_locate(key, hash_code)
+        if self._old_buckets is not None:
+            index = self._find_old(key, hash_code)
+            if index >= 0:
+                return self._old_buckets.get_at_index(index), index, 0
+
+        probe, capacity = self._probe, self._capacity
+        index = hash_code & self._mask if self._power_of_two else hash_code % capacity
+        step = probe.step_size(hash_code, capacity)
+        first_tombstone = tombstone_distance = None
         i = 0
-        while True:
-            quad_index = (hash_index + i ** 2) % self._capacity
-            bucket_entry = self._buckets.get_at_index(quad_index)
+        while i < capacity:
+            bucket_entry = self._buckets.get_at_index(index)
 
-            if bucket_entry is None or bucket_entry.is_tombstone:
-                self._buckets.set_at_index(quad_index, HashEntry(key, value))
-                self._size += 1
-                return
-            elif bucket_entry.key == key:
-                if bucket_entry.is_tombstone:
-                    self._size += 1
-                self._buckets.set_at_index(quad_index, HashEntry(key, value))
-                return
+            if bucket_entry is None:
+                break
+            if bucket_entry.is_tombstone:
+                if first_tombstone is None:
+                    first_tombstone, tombstone_distance = index, i
+            elif bucket_entry.hash_code == hash_code and bucket_entry.key == key:
+                return bucket_entry, index, 0
 
+            index = probe.next_index(index, i, step, capacity)
             i += 1
 
+        if first_tombstone is not None:
+            return None, first_tombstone, tombstone_distance
+        if i == capacity:
+            # Probe sequence exhausted without a free slot
+            self._rehash(self._next_capacity(2 * capacity))
+            return self._locate(key, hash_code)
+        return None, index, i
+
+    def _insert_at(self, index: int, distance: int, entry: HashEntry) -> None:
+        """
+        Store an entry for a key known to be absent at the slot found by _locate()
+        """
+        if self._robin_hood:
+            self._rh_insert(entry, index, distance)
+        else:
+            if self._buckets.get_at_index(index) is not None:
+                self._tombstones -= 1
+            self._buckets.set_at_index(index, entry)
+            self._count_probe(distance, 1)
+        self._size += 1
+        self._mod_count += 1
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Add delta to the value of key, treating a missing key as 0, and
+        return the new value. The key is hashed and probed for only once.
+        """
+        self._prepare_insert()
+        hash_code = self._hash(key)
+        entry, index, distance = self._locate(key, hash_code)
+        if entry is not None:
+            entry.value += delta
+            return entry.value
+        self._insert_at(index, distance, HashEntry(key, delta, hash_code))
+        return delta
+
+    def update(self, key: str, fn: callable, default: object = None) -> object:
+        """
+        Replace the value of key with fn(value), using fn(default) if the
+        key is missing, and return the new value. The key is hashed and
+        probed for only once; if fn raises, the map is left unchanged.
+        """
+        self._prepare_insert()
+        hash_code = self._hash(key)
+        entry, index, distance = self._locate(key, hash_code)
+        if entry is not None:
+            entry.value = fn(entry.value)
+            return entry.value
+        value = fn(default)
+        self._insert_at(index, distance, HashEntry(key, value, hash_code))
+        return value
+
     def table_load(self) -> float:
         """
         Return the current hash table load factor
         """
         return self.get_size() / self.get_capacity()
 
+    def occupied_load(self) -> float:
+        """
+        Return the fraction of slots that are not empty, counting tombstones
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def get_tombstone_count(self) -> int:
+        """
+        Return the number of tombstones currently in the hash table
+        """
+        return self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rehash all live entries at the current capacity, dropping tombstones
+        """
+        self._rehash(self._capacity)
+
     def empty_buckets(self) -> int:
         """
         Return the number of empty buckets in the hash table
         """
-        return sum(1 for i in range(self._capacity) if self._buckets.get_at_index(i) is None)
+        return self._capacity - (self._size - self._old_live) - self._tombstones
+
+    def _probe_length(self, entry: HashEntry, index: int) -> int:
+        """
+        Return how many probes past the home slot it takes to reach entry at index
+        """
+        if self._robin_hood:
+            return self._probe_distance(entry, index)
+
+        probe, capacity = self._probe, self._capacity
+        slot = self._home_index(entry.hash_code)
+        step = probe.step_size(entry.hash_code, capacity)
+        i = 0
+        while slot != index:
+            slot = probe.next_index(slot, i, step, capacity)
+            i += 1
+        return i
+
+    def _count_probe(self, distance: int, count: int) -> None:
+        """
+        Record in the probe histogram that count entries (negative when
+        they leave) sit distance probes past their home slot
+        """
+        histogram = self._probe_histogram
+        while distance >= len(histogram):
+            histogram.append(0)
+        histogram[distance] += count
+
+    def set_tracer(self, callback: callable = None, sample_rate: float = 1.0) -> None:
+        """
+        Pass a tracing.TraceEvent for a sample of put/get/contains_key/remove
+        calls, and for every resize or compaction, to callback, or stop
+        tracing if callback is None. The event carries the key's home slot
+        and its probe length. A map without a tracer runs exactly as before
+        (see tracing.py).
+        """
+        tracing.set_tracer(self, callback, sample_rate)
+
+    def _trace_position(self, key: str) -> tuple:
+        """
+        Return (home slot, number of probes to reach key or the first empty slot)
+        """
+        hash_code = self._hash(key)
+        probe, capacity = self._probe, self._capacity
+        index = home = self._home_index(hash_code)
+        step = probe.step_size(hash_code, capacity)
+        for i in range(capacity):
+            entry = self._buckets.get_at_index(index)
+            if entry is None or (not entry.is_tombstone and entry.hash_code == hash_code
+                                 and entry.key == key):
+                return home, i + 1
+            index = probe.next_index(index, i, step, capacity)
+        return home, capacity
+
+    def get_stats(self) -> dict:
+        """
+        Return a dictionary of probe and resize statistics. Probe distances
+        count the slots visited past an entry's home slot; chi_square is
+        the chi-square statistic of home-slot counts against a uniform
+        spread divided by its degrees of freedom (about 1.0 for a
+        well-behaved hash function, much larger when keys clump together).
+        resize_seconds covers synchronous rehashes and allocating the new
+        array of a progressive one, not the slots moved along the way.
+        The probe distances come from an incrementally kept histogram;
+        chi_square still needs the home slot of every entry, so it walks
+        the slot array once (without re-probing), and any progressive
+        rehash in progress is completed first.
+        """
+        self._finish_migration()
+        histogram = self._probe_histogram
+        total_distance = sum(distance * count for distance, count in enumerate(histogram))
+        max_distance = max((distance for distance, count in enumerate(histogram) if count),
+                           default=0)
+
+        capacity, mask = self._capacity, self._mask
+        home_counts = [0] * capacity
+        for entry in self._buckets._data:
+            if entry and not entry.is_tombstone:
+                home = entry.hash_code & mask if self._power_of_two else entry.hash_code % capacity
+                home_counts[home] += 1
+
+        if self._size and self._capacity > 1:
+            expected = self._size / self._capacity
+            chi_square = (sum((count - expected) ** 2 for count in home_counts)
+                          / expected / (self._capacity - 1))
+        else:
+            chi_square = 0.0
+
+        return {
+            'size': self._size,
+            'capacity': self._capacity,
+            'load': self.table_load(),
+            'occupied_load': self.occupied_load(),
+            'empty_buckets': self.empty_buckets(),
+            'tombstones': self._tombstones,
+            'average_probe_distance': total_distance / self._size if self._size else 0.0,
+            'max_probe_distance': max_distance,
+            'chi_square': chi_square,
+            'resize_count': self._resize_count,
+            'compaction_count': self._compaction_count,
+            'resize_seconds': self._resize_seconds,
+        }
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -113,59 +404,352 @@ class HashMap:
         if new_capacity <= self._size:
             return
 
-        new_capacity = self._next_prime(new_capacity)
-        new_table = HashMap(new_capacity, self._hash_function)
+        new_capacity = self._next_capacity(new_capacity)
+        # Keep growing the way put() would have while re-inserting,
+        # so the new table never ends up above the 0.5 load limit.
+        while 2 * (self._size - 1) >= new_capacity:
+            new_capacity = self._next_capacity(2 * new_capacity)
 
-        for i in range(self._capacity):
-            entry = self._buckets.get_at_index(i)
+        self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Move every live entry into a fresh slot array of new_capacity.
+        Keys are known to be unique and the new array has no tombstones,
+        so each existing HashEntry is dropped into the first empty slot
+        of its probe sequence without any duplicate check or reallocation.
+        """
+        self._finish_migration()
+        start = time.perf_counter()
+        self._mod_count += 1
+        old_buckets, old_capacity = self._buckets, self._capacity
+        self._buckets = DynamicArray([None] * new_capacity)
+        self._capacity = new_capacity
+        self._mask = new_capacity - 1
+        self._tombstones = 0
+        self._probe_histogram = []
+
+        for i in range(old_capacity):
+            entry = old_buckets.get_at_index(i)
             if entry and not entry.is_tombstone:
-                new_table.put(entry.key, entry.value)
+                self._place_entry(entry)
 
-        self._buckets = new_table._buckets
-        self._capacity = new_table.get_capacity()
-        self._size = new_table.get_size()
+        if new_capacity == old_capacity:
+            self._compaction_count += 1
+        else:
+            self._resize_count += 1
+        self._resize_seconds += time.perf_counter() - start
 
-    def get(self, key: str) -> object:
+    def _start_migration(self, new_capacity: int) -> None:
         """
-        Return the value associated with the given key
+        Install an empty slot array of new_capacity and keep the current
+        one as the old array, to be moved across a few slots at a time
+        """
+        self._finish_migration()
+        start = time.perf_counter()
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._old_mask = self._mask
+        self._migrate_index = 0
+        self._old_live = self._size
+        self._mod_count += 1
+
+        self._capacity = self._next_capacity(new_capacity)
+        self._mask = self._capacity - 1
+        self._buckets = DynamicArray([None] * self._capacity)
+        self._tombstones = 0
+        self._probe_histogram = []
+        self._resize_count += 1
+        self._resize_seconds += time.perf_counter() - start
+
+    def _migrate(self, count: int) -> None:
+        """
+        Move the live entries of up to count old slots into the new slot array.
+        This runs inside every put/get/remove during a migration, so it
+        works on the lists behind both arrays directly, placing entries the
+        way _place_entry() does without its DynamicArray bounds checks, and
+        is not timed into resize_seconds.
         """
-        hash_index = self._hash_function(key) % self._capacity
+        old_slots, slots = self._old_buckets._data, self._buckets._data
+        probe, capacity = self._probe, self._capacity
+        power_of_two, mask = self._power_of_two, self._mask
+        histogram = self._probe_histogram
+        index = self._migrate_index
+        end = min(index + count, self._old_capacity)
+        moved = 0
+        while index < end:
+            entry = old_slots[index]
+            if entry and not entry.is_tombstone:
+                hash_code = entry.hash_code
+                slot = hash_code & mask if power_of_two else hash_code % capacity
+                i = 0
+                if slots[slot] is not None:
+                    step = probe.step_size(hash_code, capacity)
+                    while slots[slot] is not None:
+                        slot = probe.next_index(slot, i, step, capacity)
+                        i += 1
+                slots[slot] = entry
+                while i >= len(histogram):
+                    histogram.append(0)
+                histogram[i] += 1
+                old_slots[index] = _MOVED
+                moved += 1
+            index += 1
+
+        self._old_live -= moved
+        self._migrate_index = index
+        if index == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_migration(self) -> None:
+        """
+        Complete any progressive rehash that is still in progress
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+    def _place_entry(self, entry: HashEntry) -> None:
+        """
+        Store an existing entry in the first empty slot of its probe sequence
+        """
+        if self._robin_hood:
+            self._rh_insert(entry, self._home_index(entry.hash_code), 0)
+            return
+
+        probe, capacity = self._probe, self._capacity
+        index = self._home_index(entry.hash_code)
+        step = probe.step_size(entry.hash_code, capacity)
         i = 0
-        while True:
-            quad_index = (hash_index + i ** 2) % self._capacity
-            bucket_entry = self._buckets.get_at_index(quad_index)
+        while self._buckets.get_at_index(index) is not None:
+            index = probe.next_index(index, i, step, capacity)
+            i += 1
+        self._buckets.set_at_index(index, entry)
+        self._count_probe(i, 1)
+
+    def _find(self, key: str, hash_code: int) -> int:
+        """
+        Return the slot index holding key, or -1 if the key is not present
+        """
+        if self._robin_hood:
+            return self._rh_find(key, hash_code)
+        return self._search(self._buckets, self._capacity, self._mask, key, hash_code)
+
+    def _find_old(self, key: str, hash_code: int) -> int:
+        """
+        Return the slot index of key in the old slot array of a progressive
+        rehash, or -1 if the key is not there
+        """
+        return self._search(self._old_buckets, self._old_capacity, self._old_mask,
+                            key, hash_code)
+
+    def _search(self, buckets: DynamicArray, capacity: int, mask: int,
+                key: str, hash_code: int) -> int:
+        """
+        Follow the probe sequence of hash_code through a slot array and
+        return the index holding key, or -1 if the key is not present
+        """
+        probe = self._probe
+        index = hash_code & mask if self._power_of_two else hash_code % capacity
+        step = probe.step_size(hash_code, capacity)
+        for i in range(capacity):
+            bucket_entry = buckets.get_at_index(index)
 
             if bucket_entry is None:
-                return None
-            if bucket_entry.key == key and not bucket_entry.is_tombstone:
-                return bucket_entry.value
+                return -1
+            if (bucket_entry.hash_code == hash_code and bucket_entry.key == key
+                    and not bucket_entry.is_tombstone):
+                return index
 
-            i += 1
+            index = probe.next_index(index, i, step, capacity)
+        return -1
+
+    def get(self, key: str) -> object:
+        """
+        Return the value associated with the given key
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        hash_code = self._hash(key)
+        index = self._find(key, hash_code)
+        if index >= 0:
+            return self._buckets.get_at_index(index).value
+        if self._old_buckets is not None:
+            index = self._find_old(key, hash_code)
+            if index >= 0:
+                return self._old_buckets.get_at_index(index).value
+        return None
 
     def contains_key(self, key: str) -> bool:
         """
-        Return True if the given key is in the hash map
+        Return True if the given key is in the hash map. Like get(), a key
+        stored with the value None counts as absent.
         """
-        return self.get(key) is not None
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        hash_code = self._hash(key)
+        index = self._find(key, hash_code)
+        if index >= 0:
+            return self._buckets.get_at_index(index).value is not None
+        if self._old_buckets is not None:
+            index = self._find_old(key, hash_code)
+            if index >= 0:
+                return self._old_buckets.get_at_index(index).value is not None
+        return False
 
     def remove(self, key: str) -> None:
         """
         Remove the given key and its associated value from the hash map
         """
-        hash_index = self._hash_function(key) % self._capacity
-        i = 0
+        if self._robin_hood:
+            if not self._rh_remove(key):
+                return
+        else:
+            if self._old_buckets is not None:
+                self._migrate(self._rehash_step)
+            hash_code = self._hash(key)
+            index = self._find(key, hash_code)
+            if index >= 0:
+                entry = self._buckets.get_at_index(index)
+                entry.is_tombstone = True
+                self._tombstones += 1
+                self._count_probe(self._probe_length(entry, index), -1)
+            else:
+                index = self._find_old(key, hash_code) if self._old_buckets is not None else -1
+                if index < 0:
+                    return
+                self._old_buckets.get_at_index(index).is_tombstone = True
+                self._old_live -= 1
+            self._size -= 1
+        self._mod_count += 1
+
+        if self._shrink_load is not None and self._size < self._shrink_load * self._capacity:
+            if self._shrink():
+                return
+        if self._tombstones > self._tombstone_threshold * self._capacity:
+            self.compact()
+
+    def _shrink(self) -> bool:
+        """
+        Resize down to a 0.25 load, keeping at least the minimum capacity.
+        Return True if the table was resized.
+        """
+        target = self._next_capacity(max(self._min_capacity, 4 * self._size))
+        if target >= self._capacity:
+            return False
+        self.resize_table(target)
+        return True
+
+    def reserve(self, count: int) -> None:
+        """
+        Pre-size the table so count entries fit below the 0.5 load limit
+        without another resize. The reserved capacity also becomes the
+        floor for automatic shrinking.
+        """
+        if 2 * count >= self._capacity:
+            self.resize_table(2 * count + 1)
+        self._min_capacity = max(self._min_capacity, self._next_capacity(2 * count + 1))
+
+    def _home_index(self, hash_code: int) -> int:
+        """
+        Return the first slot of the probe sequence for hash_code
+        """
+        return hash_code & self._mask if self._power_of_two else hash_code % self._capacity
+
+    def _probe_distance(self, entry: HashEntry, index: int) -> int:
+        """
+        Return how many slots entry sits past its home slot (Robin Hood mode)
+        """
+        return (index - self._home_index(entry.hash_code)) % self._capacity
+
+    def _rh_find(self, key: str, hash_code: int) -> int:
+        """
+        Return the slot index holding key, or -1 if it is not present.
+        The search stops as soon as it meets an entry closer to its home
+        slot than the key would be, since Robin Hood insertion would have
+        placed the key before that entry.
+        """
+        index = self._home_index(hash_code)
+        distance = 0
+        while True:
+            bucket_entry = self._buckets.get_at_index(index)
+            if bucket_entry is None or self._probe_distance(bucket_entry, index) < distance:
+                return -1
+            if bucket_entry.hash_code == hash_code and bucket_entry.key == key:
+                return index
+
+            index = (index + 1) % self._capacity
+            distance += 1
+
+    def _rh_locate(self, key: str, hash_code: int) -> tuple:
+        """
+        Robin Hood version of _locate(): probe linearly from the home slot
+        until the key, an empty slot, or an entry closer to its own home
+        than the key would be
+        """
+        index = self._home_index(hash_code)
+        distance = 0
         while True:
-            quad_index = (hash_index + i ** 2) % self._capacity
-            bucket_entry = self._buckets.get_at_index(quad_index)
+            bucket_entry = self._buckets.get_at_index(index)
+            if bucket_entry is None or self._probe_distance(bucket_entry, index) < distance:
+                return None, index, distance
+            if bucket_entry.hash_code == hash_code and bucket_entry.key == key:
+                return bucket_entry, index, distance
 
+            index = (index + 1) % self._capacity
+            distance += 1
+
+    def _rh_insert(self, entry: HashEntry, index: int, distance: int) -> None:
+        """
+        Place an entry known not to be in the table, starting the probe at
+        index with the given distance from its home slot. Whenever the
+        occupant of a slot is closer to its own home than the entry being
+        placed, the two swap and the displaced occupant carries on probing.
+        """
+        while True:
+            bucket_entry = self._buckets.get_at_index(index)
             if bucket_entry is None:
-                return
-            if bucket_entry.key == key and not bucket_entry.is_tombstone:
-                bucket_entry.is_tombstone = True
-                self._size -= 1
+                self._buckets.set_at_index(index, entry)
+                self._count_probe(distance, 1)
                 return
 
-            i += 1
+            occupant_distance = self._probe_distance(bucket_entry, index)
+            if occupant_distance < distance:
+                self._buckets.set_at_index(index, entry)
+                self._count_probe(distance, 1)
+                self._count_probe(occupant_distance, -1)
+                entry, distance = bucket_entry, occupant_distance
+
+            index = (index + 1) % self._capacity
+            distance += 1
+
+    def _rh_remove(self, key: str) -> bool:
+        """
+        Remove key, then shift the following entries of the cluster back
+        one slot each until an empty slot or an entry already at home.
+        Return True if the key was present.
+        """
+        index = self._rh_find(key, self._hash(key))
+        if index < 0:
+            return False
+        self._count_probe(self._probe_distance(self._buckets.get_at_index(index), index), -1)
+
+        next_index = (index + 1) % self._capacity
+        next_entry = self._buckets.get_at_index(next_index)
+        while next_entry is not None:
+            distance = self._probe_distance(next_entry, next_index)
+            if distance == 0:
+                break
+            # Each shifted entry moves one slot closer to home
+            self._count_probe(distance, -1)
+            self._count_probe(distance - 1, 1)
+            self._buckets.set_at_index(index, next_entry)
+            index = next_index
+            next_index = (index + 1) % self._capacity
+            next_entry = self._buckets.get_at_index(next_index)
+
+        self._buckets.set_at_index(index, None)
+        self._size -= 1
+        return True
 
     def clear(self) -> None:
         """
@@ -175,11 +759,60 @@ class HashMap:
         for _ in range(self._capacity):
             self._buckets.append(None)
         self._size = 0
+        self._tombstones = 0
+        self._probe_histogram = []
+        self._old_buckets = None
+        self._old_live = 0
+        self._mod_count += 1
+
+    def put_many(self, pairs, expected_count: int = None) -> None:
+        """
+        Update or add every (key, value) pair from an iterable, without
+        copying it. The number of pairs is len(pairs) for a sized input,
+        or expected_count for an iterator. The table is resized at most
+        once, up front, so that count stays below the 0.5 load limit, and
+        that many pairs are then inserted without any per-item load check;
+        any pairs past it are load-checked like put().
+        """
+        if expected_count is None:
+            expected_count = len(pairs) if hasattr(pairs, '__len__') else 0
+        needed = self._size + expected_count
+        if 2 * needed >= self._capacity:
+            self.resize_table(2 * needed + 1)
+
+        pairs = iter(pairs)
+        put_hashed, hash_function = self._put_hashed, self._hash
+        for key, value in islice(pairs, expected_count):
+            put_hashed(key, value, hash_function(key))
+        prepare_insert = self._prepare_insert
+        for key, value in pairs:
+            prepare_insert()
+            put_hashed(key, value, hash_function(key))
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Return a DynamicArray with the value for each key, in input order,
+        holding None for keys that are not present
+        """
+        result = DynamicArray()
+        get = self.get
+        for key in keys:
+            result.append(get(key))
+        return result
+
+    def remove_many(self, keys) -> None:
+        """
+        Remove every key in an iterable from the hash map
+        """
+        remove = self.remove
+        for key in keys:
+            remove(key)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Return a dynamic array of key/value pairs in the hash map
         """
+        self._finish_migration()
         da = DynamicArray()
         for i in range(self._capacity):
             entry = self._buckets.get_at_index(i)
@@ -187,24 +820,172 @@ class HashMap:
                 da.append((entry.key, entry.value))
         return da
 
-    def __iter__(self):
+    def save(self, path: str) -> None:
         """
-        Enable the hash map to be iterable
+        Write a binary snapshot of the map to path (see snapshot.py): its
+        capacity and options, the identity of its hash function, every live
+        entry's slot, cached hash code, key and value, and the slots holding
+        tombstones, which probe sequences still need to pass through
         """
-        self._iter_index = 0
-        return self
+        self._finish_migration()
+        indexes, tombstones = array('Q'), array('Q')
+        hashes, keys, values = [], [], []
+        for i in range(self._capacity):
+            entry = self._buckets.get_at_index(i)
+            if entry is None:
+                continue
+            if entry.is_tombstone:
+                tombstones.append(i)
+            else:
+                indexes.append(i)
+                hashes.append(entry.hash_code)
+                keys.append(entry.key)
+                values.append(entry.value)
+
+        write_snapshot(path, b'O', {
+            'function': function_identity(self._hash_function),
+            'capacity': self._capacity,
+            'min_capacity': self._min_capacity,
+            'options': {
+                'tombstone_threshold': self._tombstone_threshold,
+                'robin_hood': self._robin_hood,
+                'probe': self._probe.name,
+                'power_of_two': self._power_of_two,
+                'shrink_load': self._shrink_load,
+                'progressive': self._progressive,
+                'rehash_step': self._rehash_step,
+            },
+            'indexes': indexes,
+            'tombstones': tombstones,
+            'hashes': hashes,
+            'keys': keys,
+            'values': values,
+        })
 
-    def __next__(self):
+    @classmethod
+    def load(cls, path: str, function: callable = None) -> "HashMap":
         """
-        Return the next item in the hash map
+        Return a new HashMap rebuilt from a snapshot written by save().
+        Every entry is put straight back in its recorded slot, so nothing
+        is re-hashed or searched for and the table is never resized; only
+        each entry's probe distance is recounted for get_stats(). function
+        must be the hash function the map was saved with; if omitted, the
+        recorded module-level function is imported.
         """
-        while self._iter_index < self._capacity:
-            entry = self._buckets.get_at_index(self._iter_index)
-            self._iter_index += 1
+        with gc_paused():
+            record = read_snapshot(path, b'O')
+            function = resolve_hash_function(record, function)
+            options = dict(record['options'])
+            if options['probe'] not in PROBE_STRATEGIES:
+                raise ValueError(f"snapshot uses unknown probe strategy {options['probe']!r}")
+            options['probe'] = PROBE_STRATEGIES[options['probe']]()
+            m = cls(record['capacity'], function, **options)
+            if m._capacity != record['capacity']:
+                raise ValueError(f"snapshot capacity {record['capacity']} is not "
+                                 f"a valid capacity for this map")
+
+            indexes, hashes = record['indexes'], record['hashes']
+            keys, values = record['keys'], record['values']
+            check_hashes(m._hash, keys, hashes)
+
+            buckets = m._buckets
+            for j in range(len(keys)):
+                entry = HashEntry(keys[j], values[j], hashes[j])
+                buckets.set_at_index(indexes[j], entry)
+                m._count_probe(m._probe_length(entry, indexes[j]), 1)
+            for index in record['tombstones']:
+                buckets.set_at_index(index, _MOVED)
+
+            m._size = len(keys)
+            m._tombstones = len(record['tombstones'])
+            m._min_capacity = record['min_capacity']
+            return m
+
+    def _live_entries(self):
+        """
+        Yield every live HashEntry in slot order without copying the table.
+        Raises RuntimeError if a key is added or removed, or the table is
+        resized, while the generator is suspended.
+        """
+        self._finish_migration()
+        mod_count = self._mod_count
+        buckets, capacity = self._buckets, self._capacity
+        for i in range(capacity):
+            entry = buckets.get_at_index(i)
             if entry and not entry.is_tombstone:
+                yield entry
+                if self._mod_count != mod_count:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """
+        Lazily yield every key in the hash map
+        """
+        for entry in self._live_entries():
+            yield entry.key
+
+    def values(self):
+        """
+        Lazily yield every value in the hash map
+        """
+        for entry in self._live_entries():
+            yield entry.value
+
+    def items(self):
+        """
+        Lazily yield every (key, value) pair in the hash map
+        """
+        for entry in self._live_entries():
+            yield entry.key, entry.value
+
+    def __iter__(self) -> "HashMapIterator":
+        """
+        Return a new iterator over the live entries of the hash map
+        """
+        self._finish_migration()
+        return HashMapIterator(self)
+
+
+class HashMapIterator:
+    """
+    Separate iterator class for HashMap. Each one keeps its own cursor, so
+    nested loops or several threads can iterate the same map at once.
+    """
+
+    def __init__(self, hash_map: HashMap) -> None:
+        """Initialize the iterator at the first slot of the map's table."""
+        self._map = hash_map
+        self._buckets = hash_map._buckets
+        # Walk the list behind the slot array directly, skipping the
+        # DynamicArray bounds check on every slot
+        self._slots = self._buckets._data
+        self._index = 0
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self) -> HashEntry:
+        """
+        Obtain the next live entry and advance the iterator. Raises
+        RuntimeError if the map has moved to a new slot array (resize,
+        compaction or clear) since the iterator was created.
+        """
+        if self._map._buckets is not self._buckets:
+            raise RuntimeError("HashMap resized during iteration")
+
+        slots = self._slots
+        index, end = self._index, len(slots)
+        while index < end:
+            entry = slots[index]
+            index += 1
+            if entry is not None and not entry.is_tombstone:
+                self._index = index
                 return entry
+        self._index = index
         raise StopIteration
 
+
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 if __name__ == "__main__":
@@ -418,3 +1199,246 @@ if __name__ == "__main__":
   print(m)
   for item in m:
     print('K:', item.key, 'V:', item.value)
+
+  print("\n__iter__(), __next__() - nested iteration over the same map")
+  print("----------------------------------------------------------")
+  # Every iterator keeps its own cursor, so an inner loop does not
+  # disturb the outer one
+  pairs = [(outer.key, inner.key) for outer in m for inner in m]
+  print(len(pairs), m.get_size())
+  keys = [item.key for item in m]
+  print(pairs == [(a, b) for a in keys for b in keys])
+
+  print("\n__iter__(), __next__() - resize during iteration")
+  print("-----------------------------------------------")
+  m = HashMap(10, hash_function_1)
+  for i in range(4):
+    m.put(str(i), i)
+  seen = 0
+  try:
+    for item in m:
+      seen += 1
+      # Grows the table once the load reaches 0.5
+      m.put('new' + str(seen), seen)
+    print(False)
+  except RuntimeError as error:
+    print(error, seen, m.get_capacity())
+
+  print("\nRobin Hood - backward-shift remove example 1")
+  print("--------------------------------------------")
+  m = HashMap(11, hash_function_1, robin_hood=True)
+  for key in ('ab', 'ba', 'bb', 'ca'):
+    m.put(key, key.upper())
+  print(m)
+  # 'ba', 'bb' and 'ca' shift back one slot instead of leaving a tombstone
+  m.remove('ab')
+  print(m)
+  print(m.get('ab'), m.get('ba'), m.get('ca'), m.get_size(), m.get_tombstone_count())
+
+  print("\nRobin Hood - put, get and remove example 2")
+  print("------------------------------------------")
+  m = HashMap(11, hash_function_2, robin_hood=True)
+  keys = [i for i in range(1, 400, 7)]
+  for key in keys:
+    m.put(str(key), key * 10)
+  for key in keys[::3]:
+    m.remove(str(key))
+  m.put(str(keys[1]), 'updated')
+  print(m.get_size(), m.get_capacity(), m.get_tombstone_count())
+  result = True
+  for i, key in enumerate(keys):
+    # removed keys must be absent, the others reachable after the shifts
+    expected = None if i % 3 == 0 else 'updated' if i == 1 else key * 10
+    result &= m.get(str(key)) == expected
+    result &= m.contains_key(str(key)) == (i % 3 != 0)
+    # NOT inserted keys must be absent
+    result &= not m.contains_key(str(key + 1))
+  print(result)
+
+  print("\nProbe strategies - coverage example 1")
+  print("-------------------------------------")
+  for name, strategy in PROBE_STRATEGIES.items():
+    probe = strategy()
+    for capacity in (11, 53, 16, 64):
+      # fewest distinct slots the first capacity probes visit, over many keys
+      fewest = capacity
+      for hash_code in range(0, 5000, 37):
+        index = hash_code % capacity
+        step = probe.step_size(hash_code, capacity)
+        seen = set()
+        for i in range(capacity):
+          seen.add(index)
+          index = probe.next_index(index, i, step, capacity)
+        fewest = min(fewest, len(seen))
+      print(name, capacity, probe.coverage(capacity), fewest >= probe.coverage(capacity))
+
+  print("\nProbe strategies - put, get and remove example 2")
+  print("------------------------------------------------")
+  for name, strategy in PROBE_STRATEGIES.items():
+    for power_of_two in (False, True):
+      try:
+        m = HashMap(11, hash_function_2, probe=strategy(), power_of_two=power_of_two)
+      except ValueError:
+        print(name, power_of_two, 'rejected')
+        continue
+      keys = [i for i in range(1, 400, 7)]
+      for key in keys:
+        m.put(str(key), key * 10)
+      for key in keys[::3]:
+        m.remove(str(key))
+      result = True
+      for i, key in enumerate(keys):
+        result &= m.get(str(key)) == (None if i % 3 == 0 else key * 10)
+        result &= not m.contains_key(str(key + 1))
+      print(name, power_of_two, m.get_size(), m.get_capacity(), result)
+
+  print("\nPower-of-two capacities - put, resize and remove example")
+  print("--------------------------------------------------------")
+  m = HashMap(10, hash_function_1, power_of_two=True)
+  print(m.get_capacity())
+  keys = ['key' + str(i) for i in range(150)]
+  for i, key in enumerate(keys):
+    m.put(key, i)
+    if i % 30 == 29:
+      capacity = m.get_capacity()
+      print(m.get_size(), capacity, capacity & (capacity - 1) == 0,
+            round(m.table_load(), 2))
+  m.resize_table(600)
+  print(m.get_capacity())
+  for key in keys[::2]:
+    m.remove(key)
+  result = True
+  for i, key in enumerate(keys):
+    result &= m.get(key) == (None if i % 2 == 0 else i)
+  print(m.get_size(), m.get_capacity(), result)
+
+  print("\nProgressive rehashing - put, get and remove example")
+  print("---------------------------------------------------")
+  m = HashMap(11, hash_function_2, progressive=True, rehash_step=4)
+  keys = ['key' + str(i) for i in range(120)]
+  removed = set()
+  result = True
+  for i, key in enumerate(keys):
+    m.put(key, i)
+    migrating = m._old_buckets is not None
+    if migrating and i % 3 == 0:
+      # Remove while entries are still split across both slot arrays
+      m.remove(keys[i // 2])
+      removed.add(i // 2)
+      result &= m.get(keys[i // 2]) is None
+    if i % 20 == 19:
+      print(m.get_size(), m.get_capacity(), migrating)
+  for i, key in enumerate(keys):
+    result &= m.get(key) == (None if i in removed else i)
+    result &= m.contains_key(key) == (i not in removed)
+  print(m.get_size(), m.get_capacity(), m.get_keys_and_values().length() == m.get_size(),
+        result)
+
+  print("\nSnapshots - save and load round-trip example")
+  print("--------------------------------------------")
+  import os
+  import tempfile
+
+  directory = tempfile.mkdtemp()
+  for options in ({}, {'robin_hood': True}, {'probe': QuadraticProbe()},
+                  {'power_of_two': True}):
+    m = HashMap(11, hash_function_2, **options)
+    for i in range(60):
+      m.put('str' + str(i), i * 10)
+    for i in range(0, 60, 4):
+      m.remove('str' + str(i))
+    path = os.path.join(directory, 'map.snap')
+    m.save(path)
+    loaded = HashMap.load(path)
+    result = loaded.get_size() == m.get_size()
+    result &= loaded.get_capacity() == m.get_capacity()
+    result &= loaded._tombstones == m._tombstones
+    for i in range(60):
+      result &= loaded.get('str' + str(i)) == m.get('str' + str(i))
+    # The loaded map keeps working: more removes and puts
+    for i in range(1, 60, 4):
+      loaded.remove('str' + str(i))
+    for i in range(60, 90):
+      loaded.put('str' + str(i), i * 10)
+    for i in range(90):
+      expected = None if i < 60 and i % 4 in (0, 1) else i * 10
+      result &= loaded.get('str' + str(i)) == expected
+    print(sorted(options) or 'default', m._tombstones, loaded.get_size(),
+          loaded.get_capacity(), result)
+    os.remove(path)
+  os.rmdir(directory)
+
+  print("\nreserve and shrink_load")
+  print("-----------------------")
+  m = HashMap(11, hash_function_1, shrink_load=0.1)
+  m.reserve(100)
+  floor = m.get_capacity()
+  for i in range(100):
+    m.put('key' + str(i), i)
+  # reserve(n) leaves room for n keys below the 0.5 load limit,
+  # so none of the puts resized
+  result = m.get_capacity() == floor and m.get_stats()['resize_count'] == 1
+  print(m.get_size(), m.get_capacity(), result)
+
+  for i in range(100, 1000):
+    m.put('key' + str(i), i)
+  capacities = [m.get_capacity()]
+  for i in range(1000):
+    m.remove('key' + str(i))
+    if m.get_capacity() != capacities[-1]:
+      capacities.append(m.get_capacity())
+  # The drained table shrinks step by step, but never below the reserved floor
+  print(capacities)
+  result &= capacities[-1] == floor and capacities == sorted(capacities, reverse=True)
+
+  # Right after a shrink the table is at a 0.25 load, so adding back and
+  # removing a key at that point does not resize it again
+  for i in range(1000):
+    m.put('key' + str(i), i)
+  i = 0
+  capacity = m.get_capacity()
+  while m.get_capacity() == capacity:
+    m.remove('key' + str(i))
+    i += 1
+  resizes = m.get_stats()['resize_count']
+  for j in range(100):
+    m.put('key' + str(i - 1), j)
+    m.remove('key' + str(i - 1))
+  result &= m.get_stats()['resize_count'] == resizes
+  print(m.get_size(), m.get_capacity(), round(m.table_load(), 2), result)
+
+  print("\nProbe histogram and empty_buckets against a rescan")
+  print("--------------------------------------------------")
+
+  def rescan(m: HashMap) -> tuple:
+    histogram, empty = {}, 0
+    for i in range(m.get_capacity()):
+      entry = m._buckets.get_at_index(i)
+      if entry is None:
+        empty += 1
+      elif not entry.is_tombstone:
+        distance = m._probe_length(entry, i)
+        histogram[distance] = histogram.get(distance, 0) + 1
+    return histogram, empty
+
+  for options in ({}, {'robin_hood': True}):
+    m = HashMap(11, hash_function_2, shrink_load=0.1, **options)
+    steps = (
+      ('puts', lambda: [m.put('key' + str(i), i) for i in range(300)]),
+      ('updates', lambda: [m.put('key' + str(i), -i) for i in range(0, 300, 3)]),
+      ('removes', lambda: [m.remove('key' + str(i)) for i in range(0, 300, 2)]),
+      ('compaction', lambda: m.compact()),
+      ('resize', lambda: m.resize_table(2000)),
+      ('shrinking removes', lambda: [m.remove('key' + str(i)) for i in range(1, 290, 2)]),
+      ('clear', lambda: m.clear()),
+    )
+    print(sorted(options) or 'default')
+    for name, step in steps:
+      step()
+      histogram, empty = rescan(m)
+      stats = m.get_stats()
+      result = {d: c for d, c in enumerate(m._probe_histogram) if c} == histogram
+      result &= stats['max_probe_distance'] == max(histogram, default=0)
+      result &= m.empty_buckets() == stats['empty_buckets'] == empty
+      print(' ', name, m.get_size(), m.get_capacity(), m.get_tombstone_count(),
+            m.empty_buckets(), result)
@@ -0,0 +1,306 @@
+# Description: Hash Map Implementation - Open Addressing using parallel arrays
+#              (struct-of-arrays) instead of one HashEntry object per slot.
+#              Slot state lives in a bytearray and cached hash codes in an
+#              unsigned 64-bit array, so probing compares small integers
+#              before it ever touches a key object.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry, hash_function_2, is_prime,
+                        next_prime)
+
+# Slot states stored in the state bytearray
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Cached hash codes are reduced to 64 bits so they fit an array('Q')
+_HASH_MASK = (1 << 64) - 1
+
+
+class HashMap:
+    def __init__(self, capacity: int, function,
+                 tombstone_threshold: float = 0.25) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution and stores its slots as parallel arrays.
+        Once tombstones take up more than tombstone_threshold of the
+        slots, the table is compacted in place at the same capacity.
+        """
+        self._hash_function = function
+        self._tombstone_threshold = tombstone_threshold
+        self._allocate(self._next_prime(capacity))
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            state = self._states[i]
+            if state == EMPTY:
+                entry = None
+            else:
+                entry = HashEntry(self._keys[i], self._values[i], self._hashes[i])
+                entry.is_tombstone = state == TOMBSTONE
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replace the slot arrays with empty ones of the given capacity
+        """
+        self._capacity = capacity
+        self._states = bytearray(capacity)
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._size = 0
+        self._tombstones = 0
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        return next_prime(capacity)
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        return is_prime(capacity)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def _find(self, key: str, hash_code: int) -> int:
+        """
+        Return the slot index holding key, or -1 if the key is not present
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        hash_index = hash_code % capacity
+        for i in range(capacity):
+            index = (hash_index + i * i) % capacity
+            state = states[index]
+            if state == EMPTY:
+                return -1
+            if state == LIVE and hashes[index] == hash_code and keys[index] == key:
+                return index
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map. If the key exists, replace its value.
+        """
+        if self.table_load() >= 0.5:
+            self.resize_table(2 * self._capacity)
+
+        self._put_hashed(key, value, self._hash_function(key) & _HASH_MASK)
+
+    def _put_hashed(self, key: str, value: object, hash_code: int) -> None:
+        """
+        Update or add a key/value pair whose (64-bit) hash code is already known
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        hash_index = hash_code % capacity
+        first_tombstone = -1
+        slot = -1
+        for i in range(capacity):
+            index = (hash_index + i * i) % capacity
+            state = states[index]
+            if state == EMPTY:
+                slot = index
+                break
+            if state == TOMBSTONE:
+                if first_tombstone < 0:
+                    first_tombstone = index
+            elif hashes[index] == hash_code and keys[index] == key:
+                self._values[index] = value
+                return
+
+        if first_tombstone >= 0:
+            slot = first_tombstone
+            self._tombstones -= 1
+        elif slot < 0:
+            # Probe sequence exhausted without a free slot
+            self._rehash(self._next_prime(2 * capacity))
+            self._put_hashed(key, value, hash_code)
+            return
+
+        states[slot] = LIVE
+        hashes[slot] = hash_code
+        keys[slot] = key
+        self._values[slot] = value
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Return the current hash table load factor
+        """
+        return self._size / self._capacity
+
+    def occupied_load(self) -> float:
+        """
+        Return the fraction of slots that are not empty, counting tombstones
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def get_tombstone_count(self) -> int:
+        """
+        Return the number of tombstones currently in the hash table
+        """
+        return self._tombstones
+
+    def compact(self) -> None:
+        """
+        Rehash all live entries at the current capacity, dropping tombstones
+        """
+        self._rehash(self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Return the number of empty buckets in the hash table
+        """
+        return self._states.count(EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the internal hash table and rehash all entries
+        """
+        if new_capacity <= self._size:
+            return
+
+        new_capacity = self._next_prime(new_capacity)
+        # Keep growing the way put() would have while re-inserting,
+        # so the new table never ends up above the 0.5 load limit.
+        while 2 * (self._size - 1) >= new_capacity:
+            new_capacity = self._next_prime(2 * new_capacity)
+
+        self._rehash(new_capacity)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Move every live slot into fresh arrays of new_capacity using the
+        cached hash codes; keys are unique, so no duplicate check is needed.
+        """
+        old_states, old_hashes = self._states, self._hashes
+        old_keys, old_values = self._keys, self._values
+        size = self._size
+        self._allocate(new_capacity)
+
+        states, hashes, keys, values = self._states, self._hashes, self._keys, self._values
+        index = old_states.find(LIVE)
+        while index >= 0:
+            hash_code = old_hashes[index]
+            hash_index = hash_code % new_capacity
+            i = 0
+            slot = hash_index
+            while states[slot] != EMPTY:
+                i += 1
+                slot = (hash_index + i * i) % new_capacity
+            states[slot] = LIVE
+            hashes[slot] = hash_code
+            keys[slot] = old_keys[index]
+            values[slot] = old_values[index]
+            index = old_states.find(LIVE, index + 1)
+        self._size = size
+
+    def get(self, key: str) -> object:
+        """
+        Return the value associated with the given key
+        """
+        index = self._find(key, self._hash_function(key) & _HASH_MASK)
+        return self._values[index] if index >= 0 else None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Return True if the given key is in the hash map
+        """
+        return self._find(key, self._hash_function(key) & _HASH_MASK) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Remove the given key and its associated value from the hash map
+        """
+        index = self._find(key, self._hash_function(key) & _HASH_MASK)
+        if index < 0:
+            return
+
+        self._states[index] = TOMBSTONE
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+        if self._tombstones > self._tombstone_threshold * self._capacity:
+            self.compact()
+
+    def clear(self) -> None:
+        """
+        Clear the contents of the hash map
+        """
+        self._allocate(self._capacity)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Return a dynamic array of key/value pairs in the hash map
+        """
+        da = DynamicArray()
+        states, keys, values = self._states, self._keys, self._values
+        index = states.find(LIVE)
+        while index >= 0:
+            da.append((keys[index], values[index]))
+            index = states.find(LIVE, index + 1)
+        return da
+
+    def __iter__(self):
+        """
+        Yield a HashEntry for every live slot in the hash map
+        """
+        states, hashes, keys, values = self._states, self._hashes, self._keys, self._values
+        index = states.find(LIVE)
+        while index >= 0:
+            yield HashEntry(keys[index], values[index], hashes[index])
+            index = states.find(LIVE, index + 1)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+  print("\nPDF - get_keys_and_values example 1")
+  print("------------------------")
+  m = HashMap(11, hash_function_2)
+  for i in range(1, 6):
+    m.put(str(i), str(i * 10))
+  print(m.get_keys_and_values())
+
+  m.resize_table(2)
+  print(m.get_keys_and_values())
+
+  m.put('20', '200')
+  m.remove('1')
+  m.resize_table(12)
+  print(m.get_keys_and_values())
+
+  print("\nPDF - __iter__(), __next__() example 2")
+  print("---------------------")
+  m = HashMap(10, hash_function_2)
+  for i in range(5):
+    m.put(str(i), str(i * 24))
+  m.remove('0')
+  m.remove('4')
+  print(m)
+  for item in m:
+    print('K:', item.key, 'V:', item.value)
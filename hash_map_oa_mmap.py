@@ -0,0 +1,311 @@
+# Description: Read-only Open Addressing Hash Map served from a memory-mapped
+#              file. build() writes the slot layout of an Open Addressing
+#              HashMap to disk as fixed-width slots followed by a heap of
+#              key and value bytes; HashMap then answers get/contains_key
+#              by probing the mapped slots directly, with the same probe
+#              strategy, so several processes can share one copy of a large
+#              table through the OS page cache.
+#
+#              File layout (little-endian):
+#                header  _HEADER
+#                slots   capacity x _SLOT
+#                heap    function identity, then key and value bytes
+
+import mmap
+import pickle
+import struct
+
+from a6_include import builtin_hash, hash_function_2, mixed_hash_function
+import hash_map_oa
+from probing import PROBE_STRATEGIES
+from snapshot import check_hashes, function_identity, resolve_hash_function
+
+MAGIC = b'HMOAMMAP'
+VERSION = 1
+
+# magic, version, flags, capacity, size, probe name,
+# function identity offset and length
+_HEADER = struct.Struct('<8sHH4xQQ16sQI4x')
+_POWER_OF_TWO = 1
+
+# hash code, key offset, value offset, key length, value length,
+# slot state, value type
+_SLOT = struct.Struct('<QQQIIBB6x')
+
+# Slot states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Hash functions whose output is randomized per process: a table built
+# with one could not be read by any other process
+_PER_PROCESS_FUNCTIONS = (builtin_hash,)
+
+# How many live slots HashMap re-hashes on open to check its hash function
+_HASH_CHECK_SAMPLE = 8
+
+# Value types: common immutable values are stored as raw bytes,
+# anything else is pickled
+_NONE, _STR, _BYTES, _INT, _FLOAT, _PICKLE = range(6)
+_FLOAT_FORMAT = struct.Struct('<d')
+
+
+def _encode_value(value: object) -> tuple:
+    """Return (value type, bytes) for a value to be stored in the heap."""
+    if value is None:
+        return _NONE, b''
+    if type(value) is str:
+        return _STR, value.encode('utf-8')
+    if type(value) is bytes:
+        return _BYTES, value
+    if type(value) is int:
+        return _INT, value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+    if type(value) is float:
+        return _FLOAT, _FLOAT_FORMAT.pack(value)
+    return _PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode_value(value_type: int, data: bytes) -> object:
+    """Return the value stored as (value type, bytes) by _encode_value()."""
+    if value_type == _STR:
+        return data.decode('utf-8')
+    if value_type == _BYTES:
+        return bytes(data)
+    if value_type == _INT:
+        return int.from_bytes(data, 'little', signed=True)
+    if value_type == _FLOAT:
+        return _FLOAT_FORMAT.unpack(data)[0]
+    if value_type == _PICKLE:
+        return pickle.loads(data)
+    return None
+
+
+def build(path: str, source: hash_map_oa.HashMap) -> None:
+    """
+    Write the table of an Open Addressing HashMap to path for HashMap to
+    serve. Every entry keeps its slot, and tombstones are kept so probe
+    sequences through them still reach the entries behind. Keys must be
+    strings and cached hash codes must fit in 64 bits. The hash function
+    must give the same codes in every process, so builtin_hash is refused.
+    """
+    if source._hash_function in _PER_PROCESS_FUNCTIONS:
+        raise ValueError(f"{function_identity(source._hash_function)} is randomized per "
+                         f"process, so other processes could not find its keys")
+    source._finish_migration()
+    capacity = source.get_capacity()
+    probe_name = source._probe.name
+    if probe_name not in PROBE_STRATEGIES:
+        raise ValueError(f"probe strategy {source._probe!r} cannot be stored")
+
+    heap_start = _HEADER.size + capacity * _SLOT.size
+    heap = bytearray(function_identity(source._hash_function).encode('utf-8'))
+    identity_length = len(heap)
+    slots = bytearray(capacity * _SLOT.size)
+
+    for i in range(capacity):
+        entry = source._buckets.get_at_index(i)
+        if entry is None:
+            continue
+        if entry.is_tombstone:
+            _SLOT.pack_into(slots, i * _SLOT.size, 0, 0, 0, 0, 0, TOMBSTONE, 0)
+            continue
+        if not 0 <= entry.hash_code < 1 << 64:
+            raise ValueError(f"hash code of {entry.key!r} does not fit in 64 bits")
+
+        key = entry.key.encode('utf-8')
+        value_type, value = _encode_value(entry.value)
+        key_offset = heap_start + len(heap)
+        heap += key
+        value_offset = heap_start + len(heap)
+        heap += value
+        _SLOT.pack_into(slots, i * _SLOT.size, entry.hash_code, key_offset, value_offset,
+                        len(key), len(value), LIVE, value_type)
+
+    flags = _POWER_OF_TWO if source._power_of_two else 0
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, flags, capacity, source.get_size(),
+                                probe_name.encode('ascii'), heap_start, identity_length))
+        file.write(slots)
+        file.write(heap)
+
+
+class HashMap:
+
+    def __init__(self, path: str, function: callable = None) -> None:
+        """
+        Open a table written by build() read-only. Nothing is deserialized
+        up front: the file is memory-mapped and each lookup reads only the
+        slots it probes and the matching key and value. function must be
+        the hash function the table was built with; if omitted, the
+        recorded module-level function is imported. A few stored keys are
+        re-hashed and compared with their cached hash codes, raising
+        ValueError if the function does not reproduce them.
+        """
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, capacity, size, probe_name, identity_offset, \
+            identity_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a memory-mapped HashMap table")
+        if version > VERSION:
+            self._mmap.close()
+            raise ValueError(f"table format version {version} is newer than "
+                             f"the supported version {VERSION}")
+
+        identity = self._mmap[identity_offset:identity_offset + identity_length].decode('utf-8')
+        function = resolve_hash_function({'function': identity}, function)
+        self._power_of_two = bool(flags & _POWER_OF_TWO)
+        self._hash = mixed_hash_function(function) if self._power_of_two else function
+        self._probe = PROBE_STRATEGIES[probe_name.rstrip(b'\0').decode('ascii')]()
+        self._capacity = capacity
+        self._mask = capacity - 1
+        self._size = size
+        try:
+            self._check_hash_function()
+        except ValueError:
+            self._mmap.close()
+            raise
+
+    def _check_hash_function(self) -> None:
+        """
+        Re-hash the keys of the first few live slots and compare them with
+        the hash codes cached in those slots (see snapshot.check_hashes)
+        """
+        data, base, slot_size = self._mmap, _HEADER.size, _SLOT.size
+        keys, hashes = [], []
+        for i in range(self._capacity):
+            if len(keys) == _HASH_CHECK_SAMPLE:
+                break
+            slot = _SLOT.unpack_from(data, base + i * slot_size)
+            if slot[5] == LIVE:
+                key_offset = slot[1]
+                keys.append(bytes(data[key_offset:key_offset + slot[3]]).decode('utf-8'))
+                hashes.append(slot[0])
+        check_hashes(self._hash, keys, hashes)
+
+    def close(self) -> None:
+        """
+        Unmap the table file
+        """
+        self._mmap.close()
+
+    def __enter__(self) -> "HashMap":
+        """Support use as a context manager that closes the table."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the table on leaving the with block."""
+        self.close()
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Return the current hash table load factor
+        """
+        return self._size / self._capacity
+
+    def _find(self, key: str) -> tuple:
+        """
+        Return the slot tuple (see _SLOT) holding key, or None if the key is
+        not present. Probes the same sequence as the HashMap the table was
+        built from, comparing cached hash codes before any key bytes.
+        """
+        hash_code = self._hash(key)
+        probe, capacity, data = self._probe, self._capacity, self._mmap
+        unpack_from, slot_size, base = _SLOT.unpack_from, _SLOT.size, _HEADER.size
+        index = hash_code & self._mask if self._power_of_two else hash_code % capacity
+        step = probe.step_size(hash_code, capacity)
+        encoded = None
+        for i in range(capacity):
+            slot = unpack_from(data, base + index * slot_size)
+            state = slot[5]
+            if state == EMPTY:
+                return None
+            if state == LIVE and slot[0] == hash_code:
+                if encoded is None:
+                    encoded = key.encode('utf-8')
+                key_offset = slot[1]
+                if data[key_offset:key_offset + slot[3]] == encoded:
+                    return slot
+            index = probe.next_index(index, i, step, capacity)
+        return None
+
+    def get(self, key: str) -> object:
+        """
+        Return the value associated with the given key
+        """
+        slot = self._find(key)
+        if slot is None:
+            return None
+        value_offset = slot[2]
+        return _decode_value(slot[6], self._mmap[value_offset:value_offset + slot[4]])
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Return True if the given key is in the hash map. Like the Open
+        Addressing HashMap, a key stored with the value None counts as absent.
+        """
+        slot = self._find(key)
+        return slot is not None and slot[6] != _NONE
+
+    def __contains__(self, key: str) -> bool:
+        """Support `key in map`."""
+        return self.contains_key(key)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+  import os
+  import tempfile
+
+  print("\nBuild and query a memory-mapped table")
+  print("-------------------------------------")
+  source = hash_map_oa.HashMap(11, hash_function_2)
+  for i in range(20):
+    source.put('str' + str(i), i * 100)
+  source.remove('str3')
+  source.put('none', None)
+  path = os.path.join(tempfile.mkdtemp(), 'table.bin')
+  build(path, source)
+  with HashMap(path) as m:
+    print(m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+    print(m.get('str7'), m.get('str3'), m.contains_key('str19'), 'str99' in m)
+    print(m.contains_key('none') == source.contains_key('none'), 'none' in m)
+
+  print("\nRefuse per-process and non-matching hash functions")
+  print("--------------------------------------------------")
+  try:
+    build(path, hash_map_oa.HashMap(11, builtin_hash))
+  except ValueError as error:
+    print('build:', error)
+
+  # Overwrite the cached hash code of the first live slot, as if the
+  # table had been built by a function that behaves differently
+  with open(path, 'r+b') as file:
+    for i in range(source.get_capacity()):
+      offset = _HEADER.size + i * _SLOT.size
+      file.seek(offset)
+      slot = _SLOT.unpack(file.read(_SLOT.size))
+      if slot[5] == LIVE:
+        file.seek(offset)
+        file.write(_SLOT.pack(slot[0] + 1, *slot[1:]))
+        break
+  try:
+    HashMap(path)
+  except ValueError as error:
+    print('open:', error)
@@ -5,25 +5,80 @@
 # Due Date: 08/15/23
 # Description: Hash Map Implementation - Chaining using Dynamic Array and Linked List
 
+import os
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 from a6_include import (DynamicArray, LinkedList, hash_function_1,
-                        hash_function_2)
+                        hash_function_2, is_prime, mixed_hash_function,
+                        next_power_of_two, next_prime)
+from snapshot import (check_hashes, function_identity, gc_paused, read_snapshot,
+                      resolve_hash_function, write_snapshot)
+import tracing
+
+# Shared stand-in for every bucket that has never held a node. It behaves
+# like an empty LinkedList for reads; a real list replaces it on first insert.
+_EMPTY_BUCKET = LinkedList()
 
 
 class HashMap:
 
-    def __init__(self, capacity: int = 11, function: callable = hash_function_1) -> None:
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1,
+                 power_of_two: bool = False, shrink_load: float = None,
+                 progressive: bool = False, rehash_step: int = 4) -> None:
         """
-        Initialize new HashMap that uses separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Initialize new HashMap that uses separate chaining for collision resolution.
+        Buckets start out as the shared empty sentinel and only get their
+        own LinkedList once something is inserted into them.
+        With power_of_two=True capacities are powers of two, buckets are
+        picked with a bit mask instead of %, and hash codes are passed
+        through mix_hash so weak hash functions still spread out.
+        If shrink_load is given, remove() shrinks the table back to a 0.5
+        load once the load drops below shrink_load, but never below the
+        initial or reserved capacity. It must be under 0.25 so a table that
+        just shrank cannot immediately grow or shrink again.
+        With progressive=True, growth triggered by put() is spread out the
+        way Redis does it: the old and new bucket arrays coexist and every
+        put/get/contains_key/remove moves rehash_step old buckets across
+        until the old array is empty. This bounds the worst put but raises
+        the typical cost of every call made during a migration, so p99 put
+        latency goes up (see benchmarks/bench_put_latency.py).
+        empty_buckets() and __str__ describe the new array only while a
+        migration is in progress.
         """
-        self._buckets = DynamicArray()
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        if shrink_load is not None and not 0 <= shrink_load < 0.25:
+            raise ValueError("shrink_load must be in [0, 0.25)")
+
+        self._power_of_two = power_of_two
+        self._capacity = self._next_capacity(capacity)
+        self._min_capacity = self._capacity
+        self._shrink_load = shrink_load
+        self._mask = self._capacity - 1
+        self._buckets = DynamicArray([_EMPTY_BUCKET] * self._capacity)
         self._hash_function = function
+        self._hash = mixed_hash_function(function) if power_of_two else function
         self._size = 0
 
+        # _chain_histogram[n] is the number of buckets holding n nodes
+        self._chain_histogram = [self._capacity]
+        self._resize_count = 0
+        self._resize_seconds = 0.0
+        # Bumped by every insert, remove and rehash so that lazy views can
+        # tell the map changed underneath them
+        self._mod_count = 0
+
+        # Progressive rehashing: buckets below _migrate_index of the old
+        # array have already been moved into _buckets
+        self._progressive = progressive
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._old_mask = 0
+        self._migrate_index = 0
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -34,33 +89,26 @@ class HashMap:
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
         return out
 
+    def _next_capacity(self, capacity: int) -> int:
+        """
+        Round a requested capacity up to the next one allowed by the map's mode
+        """
+        if self._power_of_two:
+            return next_power_of_two(capacity)
+        return self._next_prime(capacity)
+
     def _next_prime(self, capacity: int) -> int:
         """
         Increment from given number and find the closest prime number
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity % 2 == 0:
-            capacity += 1
-        while not self._is_prime(capacity):
-            capacity += 2
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
-        if capacity == 2 or capacity == 3:
-            return True
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-        return True
+        return is_prime(capacity)
 
     def get_size(self) -> int:
         """
@@ -80,28 +128,184 @@ class HashMap:
         """
         Update or add key/value pair in the hash map
         """
-        if self.table_load() >= 1.0:
-            self.resize_table(2 * self._capacity)
+        self._prepare_insert()
+        self._put_hashed(key, value, self._hash(key))
 
-        h_index = self._hash_function(key) % self.get_capacity()
-        bucket = self._buckets.get_at_index(h_index)
-        node = bucket.contains(key)
+    def _prepare_insert(self) -> None:
+        """
+        Advance any progressive rehash and grow a full table, as every
+        call that may add a key does before hashing it
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        if self.table_load() >= 1.0:
+            if self._progressive:
+                self._start_migration(2 * self._capacity)
+            else:
+                self.resize_table(2 * self._capacity)
 
+    def _put_hashed(self, key: str, value: object, hash_code: int) -> None:
+        """
+        Update or add key/value pair whose hash code is already known
+        """
+        h_index, bucket, node = self._locate(key, hash_code)
         if node:
             node.value = value
         else:
-            bucket.insert(key, value)
-            self._size += 1
+            self._insert_at(h_index, bucket, key, value, hash_code)
+
+    def _locate(self, key: str, hash_code: int) -> tuple:
+        """
+        Return (index, bucket, node): the bucket of the current array that
+        key belongs in, with its index, and key's node from either array
+        during a progressive rehash, or None if the key is not present
+        """
+        h_index = self._home_index(hash_code)
+        bucket = self._buckets.get_at_index(h_index)
+        node = bucket.contains(key, hash_code)
+        if node is None and self._old_buckets is not None:
+            node = self._old_bucket(hash_code).contains(key, hash_code)
+        return h_index, bucket, node
+
+    def _insert_at(self, h_index: int, bucket: LinkedList, key: str,
+                   value: object, hash_code: int) -> None:
+        """
+        Add a key known to be absent to the bucket found by _locate()
+        """
+        if bucket is _EMPTY_BUCKET:
+            bucket = LinkedList()
+            self._buckets.set_at_index(h_index, bucket)
+        bucket.insert(key, value, hash_code)
+        self._count_insert(h_index, bucket.length())
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Add delta to the value of key, treating a missing key as 0, and
+        return the new value. The key is hashed and looked up only once.
+        """
+        self._prepare_insert()
+        hash_code = self._hash(key)
+        h_index, bucket, node = self._locate(key, hash_code)
+        if node:
+            node.value += delta
+            return node.value
+        self._insert_at(h_index, bucket, key, delta, hash_code)
+        return delta
+
+    def update(self, key: str, fn: callable, default: object = None) -> object:
+        """
+        Replace the value of key with fn(value), using fn(default) if the
+        key is missing, and return the new value. The key is hashed and
+        looked up only once; if fn raises, the map is left unchanged.
+        """
+        self._prepare_insert()
+        hash_code = self._hash(key)
+        h_index, bucket, node = self._locate(key, hash_code)
+        if node:
+            node.value = fn(node.value)
+            return node.value
+        value = fn(default)
+        self._insert_at(h_index, bucket, key, value, hash_code)
+        return value
+
+    def _count_insert(self, h_index: int, length: int) -> None:
+        """
+        Record one more key, just linked into bucket h_index, which now
+        holds length nodes
+        """
+        self._size += 1
+        self._mod_count += 1
+        histogram = self._chain_histogram
+        histogram[length - 1] -= 1
+        if length == len(histogram):
+            histogram.append(0)
+        histogram[length] += 1
+
+    def _count_remove(self, h_index: int, length: int) -> None:
+        """
+        Record one key fewer, just unlinked from bucket h_index, which now
+        holds length nodes
+        """
+        self._size -= 1
+        self._mod_count += 1
+        histogram = self._chain_histogram
+        histogram[length + 1] -= 1
+        histogram[length] += 1
+
+    def _recount(self) -> None:
+        """
+        Rebuild the chain histogram by measuring every bucket, after the
+        nodes were relinked wholesale
+        """
+        self._chain_histogram = self._count_chains()
+
+    def _chain_counts(self) -> list:
+        """
+        Return the chain histogram: entry n is the number of buckets
+        holding n nodes
+        """
+        return self._chain_histogram
 
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the hash table
         """
-        count = 0
-        for i in range(self.get_capacity()):
-            if self._buckets.get_at_index(i).length() == 0:
-                count += 1
-        return count
+        return self._chain_counts()[0]
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dictionary of bucket distribution and resize statistics:
+        chain_histogram maps chain length to number of buckets, and
+        chi_square is the chi-square statistic of the bucket counts against
+        a uniform spread divided by its degrees of freedom (about 1.0 for a
+        well-behaved hash function, much larger when keys clump together).
+        resize_seconds covers synchronous rehashes and allocating the new
+        array of a progressive one, not the buckets moved along the way.
+        Computed from incrementally kept counters, not by scanning buckets;
+        any progressive rehash in progress is completed first.
+        """
+        self._finish_migration()
+        histogram = self._chain_counts()
+        size = self.get_size()
+        mean = size / self._capacity
+        variance = sum(count * (length - mean) ** 2
+                       for length, count in enumerate(histogram)) / self._capacity
+        max_chain = max((length for length, count in enumerate(histogram) if count), default=0)
+        if size and self._capacity > 1:
+            chi_square = variance * self._capacity / mean / (self._capacity - 1)
+        else:
+            chi_square = 0.0
+
+        return {
+            'size': size,
+            'capacity': self._capacity,
+            'load': self.table_load(),
+            'empty_buckets': histogram[0],
+            'chain_histogram': {length: count for length, count in enumerate(histogram) if count},
+            'max_chain_length': max_chain,
+            'chain_length_variance': variance,
+            'chi_square': chi_square,
+            'resize_count': self._resize_count,
+            'resize_seconds': self._resize_seconds,
+        }
+
+    def set_tracer(self, callback: callable = None, sample_rate: float = 1.0) -> None:
+        """
+        Pass a tracing.TraceEvent for a sample of put/get/contains_key/remove
+        calls, and for every resize, to callback, or stop tracing if
+        callback is None. The event carries the key's bucket index and
+        chain length. A map without a tracer runs exactly as before (see
+        tracing.py).
+        """
+        tracing.set_tracer(self, callback, sample_rate)
+
+    def _trace_position(self, key: str) -> tuple:
+        """
+        Return (bucket index, chain length of that bucket) for key
+        """
+        hash_code = self._hash(key)
+        h_index = self._home_index(hash_code)
+        return h_index, self._buckets.get_at_index(h_index).length()
 
     def table_load(self) -> float:
         """
@@ -113,9 +317,11 @@ class HashMap:
         """
         Clears the contents of the hash map without changing the underlying hash table capacity
         """
-        for i in range(self.get_capacity()):
-            self._buckets.set_at_index(i, LinkedList())
+        self._buckets = DynamicArray([_EMPTY_BUCKET] * self._capacity)
         self._size = 0
+        self._chain_histogram = [self._capacity]
+        self._old_buckets = None
+        self._mod_count += 1
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -124,48 +330,265 @@ class HashMap:
         if new_capacity < 1:
             return
 
-        new_capacity = self._next_prime(new_capacity)
-        new_table = HashMap(new_capacity, self._hash_function)
+        self._finish_migration()
+        new_capacity = self._next_capacity(new_capacity)
+        # Keep growing the way put() would have while re-inserting,
+        # so the new table never ends up above the 1.0 load limit.
+        while self.get_size() - 1 >= new_capacity:
+            new_capacity = self._next_capacity(2 * new_capacity)
+
+        self._rehash(new_capacity)
 
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Move every node into a fresh bucket array of new_capacity
+        """
+        start = time.perf_counter()
+        self._mod_count += 1
+        new_mask = new_capacity - 1
+
+        new_buckets = DynamicArray([_EMPTY_BUCKET] * new_capacity)
+
+        # Keys are already unique, so every node can be moved straight
+        # into its new bucket: no chain search and no new SLNode.
         for i in range(self.get_capacity()):
             bucket = self._buckets.get_at_index(i)
             for node in bucket:
-                new_table.put(node.key, node.value)
+                if self._power_of_two:
+                    index = node.hash_code & new_mask
+                else:
+                    index = node.hash_code % new_capacity
+                new_bucket = new_buckets.get_at_index(index)
+                if new_bucket is _EMPTY_BUCKET:
+                    new_bucket = LinkedList()
+                    new_buckets.set_at_index(index, new_bucket)
+                new_bucket.insert_node(node)
+
+        self._buckets = new_buckets
+        self._capacity = new_capacity
+        self._mask = new_mask
+        self._recount()
+        self._resize_count += 1
+        self._resize_seconds += time.perf_counter() - start
 
-        self._buckets = new_table._buckets
-        self._capacity = new_table._capacity
-        self._size = new_table._size
+    def _count_chains(self) -> list:
+        """
+        Return a chain histogram built by measuring every bucket
+        """
+        histogram = [self._capacity]
+        for i in range(self._capacity):
+            length = self._buckets.get_at_index(i).length()
+            if length:
+                while length >= len(histogram):
+                    histogram.append(0)
+                histogram[0] -= 1
+                histogram[length] += 1
+        return histogram
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Install an empty bucket array of new_capacity and keep the current
+        one as the old array, to be moved across a few buckets at a time
+        """
+        self._finish_migration()
+        start = time.perf_counter()
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._old_mask = self._mask
+        self._migrate_index = 0
+        self._mod_count += 1
+
+        self._capacity = self._next_capacity(new_capacity)
+        self._mask = self._capacity - 1
+        self._buckets = DynamicArray([_EMPTY_BUCKET] * self._capacity)
+        self._chain_histogram = [self._capacity]
+        self._resize_count += 1
+        self._resize_seconds += time.perf_counter() - start
+
+    def _migrate(self, count: int) -> None:
+        """
+        Move the nodes of up to count old buckets into the new bucket array.
+        This runs inside every put/get/remove during a migration, so it
+        walks the lists behind both arrays and the nodes of each chain
+        directly, skipping the DynamicArray bounds checks and the
+        LinkedList iterator, and is not timed into resize_seconds.
+        """
+        old_slots, slots = self._old_buckets._data, self._buckets._data
+        histogram = self._chain_histogram
+        power_of_two, mask, capacity = self._power_of_two, self._mask, self._capacity
+        index = self._migrate_index
+        end = min(index + count, self._old_capacity)
+        while index < end:
+            bucket = old_slots[index]
+            if bucket is not _EMPTY_BUCKET:
+                old_slots[index] = _EMPTY_BUCKET
+                node = bucket._head
+                while node:
+                    # insert_node() relinks node, so step past it first
+                    next_node = node.next
+                    hash_code = node.hash_code
+                    h_index = hash_code & mask if power_of_two else hash_code % capacity
+                    new_bucket = slots[h_index]
+                    if new_bucket is _EMPTY_BUCKET:
+                        new_bucket = slots[h_index] = LinkedList()
+                    new_bucket.insert_node(node)
+                    length = new_bucket.length()
+                    histogram[length - 1] -= 1
+                    if length == len(histogram):
+                        histogram.append(0)
+                    histogram[length] += 1
+                    node = next_node
+            index += 1
+
+        self._migrate_index = index
+        if index == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_migration(self) -> None:
+        """
+        Complete any progressive rehash that is still in progress
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+    def _home_index(self, hash_code: int) -> int:
+        """
+        Return the index of the bucket of the current array for hash_code
+        """
+        return hash_code & self._mask if self._power_of_two else hash_code % self._capacity
+
+    def _old_bucket(self, hash_code: int) -> LinkedList:
+        """
+        Return the bucket of the old array (during a progressive rehash) for hash_code
+        """
+        if self._power_of_two:
+            return self._old_buckets.get_at_index(hash_code & self._old_mask)
+        return self._old_buckets.get_at_index(hash_code % self._old_capacity)
 
     def get(self, key: str):
         """
         Returns the value associated with the key, or None if the key is not present
         """
-        h_index = self._hash_function(key) % self.get_capacity()
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        hash_code = self._hash(key)
+        h_index = self._home_index(hash_code)
         bucket = self._buckets.get_at_index(h_index)
-        node = bucket.contains(key)
+        node = bucket.contains(key, hash_code)
+        if node is None and self._old_buckets is not None:
+            node = self._old_bucket(hash_code).contains(key, hash_code)
         return node.value if node else None
 
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the key is in the hash map, False otherwise
         """
-        h_index = self._hash_function(key) % self.get_capacity()
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        hash_code = self._hash(key)
+        h_index = self._home_index(hash_code)
         bucket = self._buckets.get_at_index(h_index)
-        return bucket.contains(key) is not None
+        if bucket.contains(key, hash_code) is not None:
+            return True
+        return (self._old_buckets is not None
+                and self._old_bucket(hash_code).contains(key, hash_code) is not None)
 
     def remove(self, key: str) -> None:
         """
         Removes the key from the hash map
         """
-        h_index = self._hash_function(key) % self.get_capacity()
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        if self._remove_hashed(key, self._hash(key)):
+            self._shrink()
+
+    def _remove_hashed(self, key: str, hash_code: int) -> bool:
+        """
+        Remove a key whose hash code is already known, from either array
+        during a progressive rehash. Return True if the key was present.
+        """
+        h_index = self._home_index(hash_code)
         bucket = self._buckets.get_at_index(h_index)
-        if bucket.remove(key):
+        if bucket.remove(key, hash_code):
+            self._count_remove(h_index, bucket.length())
+            if bucket.length() == 0:
+                self._buckets.set_at_index(h_index, _EMPTY_BUCKET)
+            return True
+        if self._old_buckets is not None and self._old_bucket(hash_code).remove(key, hash_code):
             self._size -= 1
+            self._mod_count += 1
+            return True
+        return False
+
+    def _shrink(self) -> None:
+        """
+        Once the load has dropped below shrink_load, resize down to a 0.5
+        load, keeping at least the minimum capacity
+        """
+        size = self.get_size()
+        if self._shrink_load is None or size >= self._shrink_load * self._capacity:
+            return
+        target = self._next_capacity(max(self._min_capacity, 2 * size))
+        if target < self._capacity:
+            self.resize_table(target)
+
+    def reserve(self, count: int) -> None:
+        """
+        Pre-size the table so count entries fit without another resize.
+        The reserved capacity also becomes the floor for automatic shrinking.
+        """
+        if count > self._capacity:
+            self.resize_table(count)
+        self._min_capacity = max(self._min_capacity, self._next_capacity(count))
+
+    def put_many(self, pairs, expected_count: int = None) -> None:
+        """
+        Update or add every (key, value) pair from an iterable, without
+        copying it. The number of pairs is len(pairs) for a sized input,
+        or expected_count for an iterator. The table is resized at most
+        once, up front, for that count, and that many pairs are then
+        inserted without any per-item load check; any pairs past it are
+        load-checked like put().
+        """
+        if expected_count is None:
+            expected_count = len(pairs) if hasattr(pairs, '__len__') else 0
+        needed = self.get_size() + expected_count
+        if needed > self._capacity:
+            self.resize_table(needed)
+
+        pairs = iter(pairs)
+        put_hashed, hash_function = self._put_hashed, self._hash
+        for key, value in islice(pairs, expected_count):
+            put_hashed(key, value, hash_function(key))
+        prepare_insert = self._prepare_insert
+        for key, value in pairs:
+            prepare_insert()
+            put_hashed(key, value, hash_function(key))
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a DynamicArray with the value for each key, in input order,
+        holding None for keys that are not present
+        """
+        result = DynamicArray()
+        get = self.get
+        for key in keys:
+            result.append(get(key))
+        return result
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in an iterable from the hash map
+        """
+        remove = self.remove
+        for key in keys:
+            remove(key)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns all key/value pairs as a DynamicArray of tuples
         """
+        self._finish_migration()
         result = DynamicArray()
         for i in range(self.get_capacity()):
             bucket = self._buckets.get_at_index(i)
@@ -173,32 +596,228 @@ class HashMap:
                 result.append((node.key, node.value))
         return result
 
+    def save(self, path: str) -> None:
+        """
+        Write a binary snapshot of the map to path (see snapshot.py): its
+        capacity and options, the identity of its hash function, and every
+        node's bucket index, cached hash code, key and value, in bucket
+        and chain order
+        """
+        self._finish_migration()
+        indexes, hashes, keys, values = array('Q'), [], [], []
+        for i in range(self._capacity):
+            for node in self._buckets.get_at_index(i):
+                indexes.append(i)
+                hashes.append(node.hash_code)
+                keys.append(node.key)
+                values.append(node.value)
+
+        write_snapshot(path, b'S', {
+            'function': function_identity(self._hash_function),
+            'capacity': self._capacity,
+            'min_capacity': self._min_capacity,
+            'options': {
+                'power_of_two': self._power_of_two,
+                'shrink_load': self._shrink_load,
+                'progressive': self._progressive,
+                'rehash_step': self._rehash_step,
+            },
+            'indexes': indexes,
+            'hashes': hashes,
+            'keys': keys,
+            'values': values,
+        })
+
+    @classmethod
+    def load(cls, path: str, function: callable = None) -> "HashMap":
+        """
+        Return a new HashMap rebuilt from a snapshot written by save().
+        Every node is linked straight into its recorded bucket, so nothing
+        is re-hashed and the table is never resized. function must be the
+        hash function the map was saved with; if omitted, the recorded
+        module-level function is imported.
+        """
+        with gc_paused():
+            record = read_snapshot(path, b'S')
+            function = resolve_hash_function(record, function)
+            m = cls(record['capacity'], function, **record['options'])
+            if m._capacity != record['capacity']:
+                raise ValueError(f"snapshot capacity {record['capacity']} is not "
+                                 f"a valid capacity for this map")
+
+            indexes, hashes = record['indexes'], record['hashes']
+            keys, values = record['keys'], record['values']
+            check_hashes(m._hash, keys, hashes)
+
+            # Chains were saved front to back and insert() links at the front,
+            # so walk the entries backwards to rebuild each chain in its order
+            buckets = m._buckets
+            for j in range(len(keys) - 1, -1, -1):
+                index = indexes[j]
+                bucket = buckets.get_at_index(index)
+                if bucket is _EMPTY_BUCKET:
+                    bucket = LinkedList()
+                    buckets.set_at_index(index, bucket)
+                bucket.insert(keys[j], values[j], hashes[j])
+
+            m._size = len(keys)
+            m._min_capacity = record['min_capacity']
+            m._recount()
+            return m
+
+    def _nodes(self):
+        """
+        Yield every node in bucket order without copying the table.
+        Raises RuntimeError if a key is added or removed, or the table is
+        resized, while the generator is suspended.
+        """
+        self._finish_migration()
+        mod_count = self._mod_count
+        buckets, capacity = self._buckets, self._capacity
+        for i in range(capacity):
+            for node in buckets.get_at_index(i):
+                yield node
+                if self._mod_count != mod_count:
+                    raise RuntimeError("HashMap changed during iteration")
+
+    def keys(self):
+        """
+        Lazily yields every key in the hash map
+        """
+        for node in self._nodes():
+            yield node.key
+
+    def values(self):
+        """
+        Lazily yields every value in the hash map
+        """
+        for node in self._nodes():
+            yield node.value
+
+    def items(self):
+        """
+        Lazily yields every (key, value) pair in the hash map
+        """
+        for node in self._nodes():
+            yield node.key, node.value
+
+    def __iter__(self):
+        """
+        Iterates over the keys of the hash map, like a dict. This differs
+        from hash_map_oa.HashMap, whose iterator yields HashEntry objects as
+        the assignment specifies; items() gives the same (key, value)
+        pairs in both maps.
+        """
+        return self.keys()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys in the hash map
+        """
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Supports `key in map`
+        """
+        return self.contains_key(key)
+
 
 def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
   """
-    TODO: Write this implementation
+    Return the most frequent values in da and their frequency, in a single
+    pass: each value is counted with one increment() and the running
+    maximum and the values tied at it are kept as we go. Tied values come
+    out in the order they reached the top frequency, which is the order of
+    their last occurrence.
     """
-  # if you'd like to use a hash map,
-  # use this instance of your Separate Chaining HashMap
   map = HashMap()
+  increment = map.increment
+  mode_arr = DynamicArray()
+  freq = 0
   for j in range(da.length()):
-    if not map.contains_key(da.get_at_index(j)):
-      map.put(da.get_at_index(j), 1)
+    value = da.get_at_index(j)
+    count = increment(value)
+    if count > freq:
+      freq = count
+      mode_arr = DynamicArray([value])
+    elif count == freq:
+      mode_arr.append(value)
+
+  return mode_arr, freq
+
+
+def _count_chunk(keys: list, offset: int) -> list:
+  """
+    Count one chunk of find_mode_parallel's input, which starts at position
+    offset of the whole input, and return (key, count, last position) tuples
+    """
+  counts = HashMap()
+  for j, key in enumerate(keys, offset):
+    entry = counts.get(key)
+    if entry is None:
+      counts.put(key, [1, j])
     else:
-      map.put(da.get_at_index(j), map.get(da.get_at_index(j)) + 1)
+      entry[0] += 1
+      entry[1] = j
+  pairs = counts.get_keys_and_values()
+  return [(key, count, last) for key, (count, last) in
+          (pairs.get_at_index(i) for i in range(pairs.length()))]
 
-  freq = 0
-  new_arr = map.get_keys_and_values()
-  mode_arr = DynamicArray()
-  for j in range(new_arr.length()):
-    if freq < new_arr.get_at_index(j)[1]:
-      freq = new_arr.get_at_index(j)[1]
 
-  for j in range(new_arr.length()):
-    if new_arr.get_at_index(j)[1] == freq:
-      mode_arr.append(new_arr.get_at_index(j)[0])
+def find_mode_parallel(da: DynamicArray, workers: int = None,
+                       chunk_size: int = 1_000_000) -> tuple[DynamicArray, int]:
+  """
+    Same result as find_mode, counted in worker processes.
+    The input is cut into contiguous chunks of chunk_size elements, each
+    counted by one of workers processes (default: one per CPU), and the
+    partial counts are merged in chunk order. Workers also report each
+    key's last position, so tied values are put in the same
+    last-occurrence order find_mode returns them in.
+    At most two chunks per worker are in flight at once.
+    """
+  if chunk_size < 1:
+    raise ValueError("chunk_size must be at least 1")
 
-  return mode_arr, freq
+  length = da.length()
+  get = da.get_at_index
+  workers = workers or os.cpu_count() or 1
+  map = HashMap()
+
+  def merge(partial: list) -> None:
+    for key, count, last in partial:
+      entry = map.get(key)
+      if entry is None:
+        map.put(key, [count, last])
+      else:
+        entry[0] += count
+        entry[1] = max(entry[1], last)
+
+  if length <= chunk_size or workers == 1:
+    merge(_count_chunk([get(j) for j in range(length)], 0))
+  else:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      pending = deque()
+      for start in range(0, length, chunk_size):
+        if len(pending) == 2 * workers:
+          merge(pending.popleft().result())
+        chunk = [get(j) for j in range(start, min(start + chunk_size, length))]
+        pending.append(executor.submit(_count_chunk, chunk, start))
+      while pending:
+        merge(pending.popleft().result())
+
+  pairs = map.get_keys_and_values()
+  freq = 0
+  tied = []
+  for i in range(pairs.length()):
+    key, (count, last) = pairs.get_at_index(i)
+    if count > freq:
+      freq = count
+      tied = [(last, key)]
+    elif count == freq:
+      tied.append((last, key))
+  tied.sort()
+  return DynamicArray([key for last, key in tied]), freq
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -409,3 +1028,115 @@ if __name__ == "__main__":
   #     da = DynamicArray(case)
   #     mode, frequency = find_mode(da)
   #     print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+  print("\nfind_mode_parallel - same modes, frequency and tie order as find_mode")
+  print("----------------------------------------------------------------------")
+  test_cases = (
+    ["apple", "apple", "grape", "melon", "peach"],
+    ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint", "Ubuntu", "Ubuntu", "Ubuntu"],
+    ["one", "two", "three", "four", "five"],
+    ["2", "4", "2", "6", "8", "4", "1", "3", "4", "5", "7", "3", "3", "2"]
+  )
+
+  result = True
+  for case in test_cases:
+    da = DynamicArray(case)
+    mode, frequency = find_mode(da)
+    parallel_mode, parallel_frequency = find_mode_parallel(da, workers=2, chunk_size=3)
+    print(f"Input: {da}\nMode : {parallel_mode}, Frequency: {parallel_frequency}")
+    result &= str(parallel_mode) == str(mode) and parallel_frequency == frequency
+  print(result)
+
+  print("\nreserve and shrink_load")
+  print("-----------------------")
+  m = HashMap(11, hash_function_1, shrink_load=0.2)
+  m.reserve(100)
+  floor = m.get_capacity()
+  for i in range(100):
+    m.put('key' + str(i), i)
+  # reserve(n) leaves room for n keys, so none of the puts resized
+  result = m.get_capacity() == floor and m.get_stats()['resize_count'] == 1
+  print(m.get_size(), m.get_capacity(), result)
+
+  for i in range(100, 1000):
+    m.put('key' + str(i), i)
+  capacities = [m.get_capacity()]
+  for i in range(1000):
+    m.remove('key' + str(i))
+    if m.get_capacity() != capacities[-1]:
+      capacities.append(m.get_capacity())
+  # The drained table shrinks step by step, but never below the reserved floor
+  print(capacities)
+  result &= capacities[-1] == floor and capacities == sorted(capacities, reverse=True)
+
+  # Right after a shrink the table is at a 0.5 load, so adding back and
+  # removing a key at that point does not resize it again
+  for i in range(1000):
+    m.put('key' + str(i), i)
+  i = 0
+  capacity = m.get_capacity()
+  while m.get_capacity() == capacity:
+    m.remove('key' + str(i))
+    i += 1
+  resizes = m.get_stats()['resize_count']
+  for j in range(100):
+    m.put('key' + str(i - 1), j)
+    m.remove('key' + str(i - 1))
+  result &= m.get_stats()['resize_count'] == resizes
+  print(m.get_size(), m.get_capacity(), round(m.table_load(), 2), result)
+
+  print("\nkeys, values, items, iteration, len and in")
+  print("------------------------------------------")
+  m = HashMap(7, hash_function_1)
+  for i in range(10):
+    m.put('key' + str(i), i * 10)
+  print(len(m), 'key3' in m, 'key10' in m)
+  result = len(m) == m.get_size() == 10 and 'key3' in m and 'key10' not in m
+  result &= sorted(m) == sorted(m.keys()) == sorted('key' + str(i) for i in range(10))
+  result &= sorted(m.values()) == [i * 10 for i in range(10)]
+  result &= dict(m.items()) == {'key' + str(i): i * 10 for i in range(10)}
+  result &= all(m.get(key) == value for key, value in m.items())
+
+  # Replacing values while iterating is allowed: no key is added or removed
+  for key in m:
+    m.put(key, m.get(key) + 1)
+  result &= sorted(m.values()) == [i * 10 + 1 for i in range(10)]
+
+  # Adding or removing a key, or resizing, while iterating raises RuntimeError
+  for change in (lambda: m.put('new key', 0), lambda: m.remove('key5'),
+                 lambda: m.resize_table(50)):
+    try:
+      for key in m.keys():
+        change()
+      result = False
+    except RuntimeError as error:
+      print(error)
+  result &= len(m) == 10 and 'new key' in m and 'key5' not in m
+  print(result)
+
+  print("\nChain histogram and empty_buckets against a rescan")
+  print("--------------------------------------------------")
+
+  def rescan(m: HashMap) -> dict:
+    histogram = {}
+    for i in range(m.get_capacity()):
+      length = m._buckets.get_at_index(i).length()
+      histogram[length] = histogram.get(length, 0) + 1
+    return histogram
+
+  m = HashMap(11, hash_function_2, shrink_load=0.2)
+  steps = (
+    ('puts', lambda: [m.put('key' + str(i), i) for i in range(300)]),
+    ('updates', lambda: [m.put('key' + str(i), -i) for i in range(0, 300, 3)]),
+    ('removes', lambda: [m.remove('key' + str(i)) for i in range(0, 300, 2)]),
+    ('resize', lambda: m.resize_table(40)),
+    ('shrinking removes', lambda: [m.remove('key' + str(i)) for i in range(1, 290, 2)]),
+    ('clear', lambda: m.clear()),
+  )
+  for name, step in steps:
+    step()
+    histogram = rescan(m)
+    stats = m.get_stats()
+    result = stats['chain_histogram'] == histogram
+    result &= m.empty_buckets() == stats['empty_buckets'] == histogram.get(0, 0)
+    print(name, m.get_size(), m.get_capacity(), m.empty_buckets(), result)
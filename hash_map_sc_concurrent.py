@@ -0,0 +1,401 @@
+# Description: Thread-safe Hash Map - Chaining with lock striping. The bucket
+#              array is split into stripes (bucket index % stripes), each
+#              guarded by its own lock, so operations on buckets of
+#              different stripes never wait for each other. The chaining
+#              itself (bucket search, insert, remove, chain bookkeeping,
+#              rehash) is inherited from hash_map_sc.HashMap; this class
+#              only decides which locks each call holds. The size and the
+#              chain histogram are kept per stripe and updated under the
+#              stripe lock the caller already holds, so writes to different
+#              stripes share no lock at all. Anything that touches the whole
+#              table (resize, clear, snapshots, stats) takes every stripe
+#              lock so it never runs concurrently with anything else.
+
+import threading
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+import hash_map_sc
+
+
+class HashMap(hash_map_sc.HashMap):
+
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1,
+                 stripes: int = 16, power_of_two: bool = False,
+                 shrink_load: float = None, progressive: bool = False,
+                 rehash_step: int = 4) -> None:
+        """
+        Initialize new thread-safe HashMap that uses separate chaining for
+        collision resolution and stripes locks over the bucket array.
+        power_of_two and shrink_load work as in hash_map_sc.HashMap.
+        Progressive rehashing would move buckets of every stripe on each
+        call, so it is not supported. The hash function is called outside
+        any lock, so it can run concurrently in every thread.
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        if progressive:
+            raise ValueError("progressive rehashing is not supported by the thread-safe map")
+
+        super().__init__(capacity, function, power_of_two=power_of_two,
+                         shrink_load=shrink_load, rehash_step=rehash_step)
+        self._stripes = stripes
+        # Reentrant, so a call that already holds every stripe lock (growth
+        # in put, shrinking in remove) can go through resize_table()
+        self._locks = [threading.RLock() for _ in range(stripes)]
+        # _counts[s] is the number of keys in the buckets of stripe s and
+        # _histograms[s] the chain histogram of those buckets; the inherited
+        # _size and _chain_histogram are not used
+        self._counts = [0] * stripes
+        self._histograms = [[0] for _ in range(stripes)]
+        self._recount()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        self._lock_all()
+        try:
+            return super().__str__()
+        finally:
+            self._unlock_all()
+
+    def _lock_all(self) -> None:
+        """
+        Acquire every stripe lock, always in stripe order so two callers
+        cannot deadlock each other
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Release every stripe lock taken by _lock_all()
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def _lock_bucket(self, hash_code: int) -> int:
+        """
+        Acquire the stripe lock guarding the bucket of hash_code and return
+        the stripe. A resize may move the bucket to another stripe between
+        picking the lock and getting it; the stripe is worked out again
+        once the lock is held and the lookup retried if it moved.
+        """
+        locks, stripes = self._locks, self._stripes
+        while True:
+            stripe = self._home_index(hash_code) % stripes
+            locks[stripe].acquire()
+            if self._home_index(hash_code) % stripes == stripe:
+                return stripe
+            locks[stripe].release()
+
+    def _prepare_insert(self) -> None:
+        """
+        Grow a full table under every stripe lock. The load is checked
+        again once the locks are held, in case another thread grew it first.
+        """
+        if self.get_size() >= self._capacity:
+            self._lock_all()
+            try:
+                super()._prepare_insert()
+            finally:
+                self._unlock_all()
+
+    def _put_hashed(self, key: str, value: object, hash_code: int) -> None:
+        """
+        Update or add key/value pair whose hash code is already known,
+        under the key's stripe lock
+        """
+        stripe = self._lock_bucket(hash_code)
+        try:
+            super()._put_hashed(key, value, hash_code)
+        finally:
+            self._locks[stripe].release()
+
+    def _count_insert(self, h_index: int, length: int) -> None:
+        """
+        Record one more key in the counters of bucket h_index's stripe.
+        The caller holds that stripe's lock.
+        """
+        stripe = h_index % self._stripes
+        self._counts[stripe] += 1
+        # Lazy views only compare the mod count for change, so a bump lost
+        # to a concurrent one from another stripe still marks the change
+        self._mod_count += 1
+        histogram = self._histograms[stripe]
+        histogram[length - 1] -= 1
+        if length == len(histogram):
+            histogram.append(0)
+        histogram[length] += 1
+
+    def _count_remove(self, h_index: int, length: int) -> None:
+        """
+        Record one key fewer in the counters of bucket h_index's stripe.
+        The caller holds that stripe's lock.
+        """
+        stripe = h_index % self._stripes
+        self._counts[stripe] -= 1
+        self._mod_count += 1
+        histogram = self._histograms[stripe]
+        histogram[length + 1] -= 1
+        histogram[length] += 1
+
+    def _recount(self) -> None:
+        """
+        Rebuild every stripe's size and chain histogram by measuring every
+        bucket. Runs with every stripe lock held, or before the map is shared.
+        """
+        stripes = self._stripes
+        counts = [0] * stripes
+        histograms = [[0] for _ in range(stripes)]
+        for i in range(self._capacity):
+            length = self._buckets.get_at_index(i).length()
+            histogram = histograms[i % stripes]
+            while length >= len(histogram):
+                histogram.append(0)
+            histogram[length] += 1
+            counts[i % stripes] += length
+        self._counts = counts
+        self._histograms = histograms
+
+    def _chain_counts(self) -> list:
+        """
+        Return the chain histogram of the whole table, merged from the
+        stripes. get_stats() calls this with every stripe lock held.
+        """
+        merged = []
+        for histogram in self._histograms:
+            if len(histogram) > len(merged):
+                merged.extend([0] * (len(histogram) - len(merged)))
+            for length, count in enumerate(histogram):
+                merged[length] += count
+        return merged
+
+    def get_size(self) -> int:
+        """
+        Return size of map. Without a lock this is a moment-in-time
+        sum of the per-stripe counters.
+        """
+        return sum(self._counts)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of keys in the hash map, summed over the stripes
+        """
+        return sum(self._counts)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor, from the per-stripe counters
+        """
+        return sum(self._counts) / self._capacity
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Add delta to the value of key, treating a missing key as 0, and
+        return the new value, all under the key's stripe lock
+        """
+        self._prepare_insert()
+        hash_code = self._hash(key)
+        stripe = self._lock_bucket(hash_code)
+        try:
+            h_index, bucket, node = self._locate(key, hash_code)
+            if node:
+                node.value += delta
+                return node.value
+            self._insert_at(h_index, bucket, key, delta, hash_code)
+            return delta
+        finally:
+            self._locks[stripe].release()
+
+    def update(self, key: str, fn: callable, default: object = None) -> object:
+        """
+        Replace the value of key with fn(value), using fn(default) if the
+        key is missing, and return the new value. fn runs under the key's
+        stripe lock, so it must not call back into the map.
+        """
+        self._prepare_insert()
+        hash_code = self._hash(key)
+        stripe = self._lock_bucket(hash_code)
+        try:
+            h_index, bucket, node = self._locate(key, hash_code)
+            if node:
+                node.value = fn(node.value)
+                return node.value
+            value = fn(default)
+            self._insert_at(h_index, bucket, key, value, hash_code)
+            return value
+        finally:
+            self._locks[stripe].release()
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the key, or None if the key is not present
+        """
+        hash_code = self._hash(key)
+        stripe = self._lock_bucket(hash_code)
+        try:
+            node = self._locate(key, hash_code)[2]
+        finally:
+            self._locks[stripe].release()
+        return node.value if node else None
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the key is in the hash map, False otherwise
+        """
+        hash_code = self._hash(key)
+        stripe = self._lock_bucket(hash_code)
+        try:
+            return self._locate(key, hash_code)[2] is not None
+        finally:
+            self._locks[stripe].release()
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the key from the hash map
+        """
+        hash_code = self._hash(key)
+        stripe = self._lock_bucket(hash_code)
+        try:
+            removed = self._remove_hashed(key, hash_code)
+        finally:
+            self._locks[stripe].release()
+        if removed and self._shrink_load is not None:
+            self._shrink()
+
+    def _shrink(self) -> None:
+        """
+        Shrink the table as hash_map_sc.HashMap does, under every stripe lock
+        """
+        self._lock_all()
+        try:
+            super()._shrink()
+        finally:
+            self._unlock_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table and rehashes all key/value pairs
+        """
+        self._lock_all()
+        try:
+            super().resize_table(new_capacity)
+        finally:
+            self._unlock_all()
+
+    def reserve(self, count: int) -> None:
+        """
+        Pre-size the table so count entries fit without another resize
+        """
+        self._lock_all()
+        try:
+            super().reserve(count)
+        finally:
+            self._unlock_all()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the underlying hash table capacity
+        """
+        self._lock_all()
+        try:
+            super().clear()
+            self._recount()
+        finally:
+            self._unlock_all()
+
+    def get_stats(self) -> dict:
+        """
+        Returns the statistics of hash_map_sc.HashMap.get_stats(), taken as
+        one consistent snapshot with the stripes' histograms merged
+        """
+        self._lock_all()
+        try:
+            return super().get_stats()
+        finally:
+            self._unlock_all()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns all key/value pairs as a DynamicArray of tuples, taken as
+        one consistent snapshot. keys(), values() and items() walk the
+        table without locks and raise RuntimeError if another thread adds
+        or removes a key meanwhile.
+        """
+        self._lock_all()
+        try:
+            return super().get_keys_and_values()
+        finally:
+            self._unlock_all()
+
+    def save(self, path: str) -> None:
+        """
+        Write a snapshot of the map to path, as one consistent snapshot
+        """
+        self._lock_all()
+        try:
+            super().save(path)
+        finally:
+            self._unlock_all()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+  print("\nConcurrent puts from several threads")
+  print("------------------------------------")
+  m = HashMap(53, hash_function_2)
+
+  def worker(start: int) -> None:
+    for i in range(start, start + 1000):
+      m.put('str' + str(i), i)
+
+  threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(4)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  print(m.get_size(), m.get_capacity(), m.get('str2500'), m.contains_key('str4000'))
+
+  print("\nConcurrent increments and removes from several threads")
+  print("------------------------------------------------------")
+  m = HashMap(11, hash_function_2, stripes=4, shrink_load=0.1)
+
+  def run_threads(target) -> None:
+    threads = [threading.Thread(target=target, args=(n,)) for n in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+  def counter(offset: int) -> None:
+    for i in range(2000):
+      m.increment('key' + str((i + offset) % 500))
+
+  def remover(offset: int) -> None:
+    for i in range(offset, 500, 4):
+      m.remove('key' + str(i))
+
+  run_threads(counter)
+  print(m.get_size(), m.get_capacity(),
+        all(m.get('key' + str(i)) == 16 for i in range(500)))
+  run_threads(remover)
+  stats = m.get_stats()
+  print(m.get_size(), m.get_capacity(), stats['empty_buckets'] == m.get_capacity())
+
+  print("\nPDF - get_keys_and_values example 1")
+  print("------------------------")
+  m = HashMap(11, hash_function_2)
+  for i in range(1, 6):
+    m.put(str(i), str(i * 10))
+  print(m.get_keys_and_values())
+
+  m.resize_table(2)
+  print(m.get_keys_and_values())
+
+  m.put('20', '200')
+  m.remove('1')
+  m.resize_table(12)
+  print(m.get_keys_and_values())
@@ -0,0 +1,135 @@
+# Description: Streaming mode / heavy-hitters counting on top of the chaining
+#              HashMap. Items are fed one at a time from any iterable, so the
+#              input never has to sit in a DynamicArray. Without a counter
+#              limit every distinct key is counted exactly; with one, the
+#              Misra-Gries summary keeps at most that many counters and
+#              reports how far each count may be off.
+
+from a6_include import DynamicArray, hash_function_1
+from hash_map_sc import HashMap
+
+
+class HeavyHitters:
+
+    def __init__(self, counters: int = None, function: callable = hash_function_1) -> None:
+        """
+        Initialize an empty summary. With counters=None every key gets its
+        own exact count. With counters=m at most m keys are tracked
+        (Misra-Gries): when an untracked key arrives and all m counters are
+        in use, every counter is decremented by one and the ones that reach
+        zero are dropped. Any key whose true frequency is above
+        total / (m + 1) is guaranteed to still be tracked.
+        """
+        if counters is not None and counters < 1:
+            raise ValueError("counters must be at least 1")
+
+        self._limit = counters
+        self._counts = HashMap(11, function)
+        self._total = 0
+        self._decrements = 0
+
+    def add(self, key: str, count: int = 1) -> None:
+        """
+        Record count more occurrences of key
+        """
+        self._total += count
+        counts = self._counts
+        if self._limit is None or counts.get_size() < self._limit:
+            counts.increment(key, count)
+            return
+        if counts.get(key) is not None:
+            counts.increment(key, count)
+            return
+
+        # Table full: the new key and every tracked key all lose the same
+        # amount, the smaller of count and the lowest tracked count
+        pairs = counts.get_keys_and_values()
+        lowest = count
+        for i in range(pairs.length()):
+            lowest = min(lowest, pairs[i][1])
+        self._decrements += lowest
+        for i in range(pairs.length()):
+            tracked, tracked_count = pairs[i]
+            if tracked_count == lowest:
+                counts.remove(tracked)
+            else:
+                counts.put(tracked, tracked_count - lowest)
+        if count > lowest:
+            counts.put(key, count - lowest)
+
+    def update(self, items) -> None:
+        """
+        Record one occurrence of every key in an iterable
+        """
+        add = self.add
+        for key in items:
+            add(key)
+
+    def get_total(self) -> int:
+        """
+        Return the number of occurrences seen so far
+        """
+        return self._total
+
+    def error_bound(self) -> int:
+        """
+        Return the most any reported count can be below the true frequency:
+        0 in exact mode, at most total / (counters + 1) otherwise.
+        Untracked keys occur at most this many times.
+        """
+        return self._decrements
+
+    def top(self, k: int = 1) -> DynamicArray:
+        """
+        Returns up to k (key, count, error) tuples, highest count first.
+        The true frequency of each key lies in [count, count + error].
+        """
+        pairs = self._counts.get_keys_and_values()
+        ranked = sorted((pairs[i] for i in range(pairs.length())),
+                        key=lambda pair: pair[1], reverse=True)
+        error = self._decrements
+        return DynamicArray([(key, count, error) for key, count in ranked[:k]])
+
+    def mode(self) -> tuple[DynamicArray, int]:
+        """
+        Returns the keys with the highest count and that count, like find_mode,
+        in one pass over the counters. In approximate mode the count is a
+        lower bound (see error_bound()).
+        """
+        mode_arr = DynamicArray()
+        freq = 0
+        for key, count in self._counts.items():
+            if count > freq:
+                freq = count
+                mode_arr = DynamicArray([key])
+            elif count == freq:
+                mode_arr.append(key)
+        return mode_arr, freq
+
+
+def find_mode_stream(items, k: int = 1, counters: int = None) -> DynamicArray:
+  """
+    Count the keys of any iterable (a file, a generator, ...) in one pass and
+    return the top k as (key, count, error) tuples; see HeavyHitters
+    """
+  summary = HeavyHitters(counters)
+  summary.update(items)
+  return summary.top(k)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+  print("\nExact top 3")
+  print("-----------")
+  words = "the cat and the dog and the bird saw the cat".split()
+  print(find_mode_stream(iter(words), k=3))
+
+  print("\nMisra-Gries with 2 counters")
+  print("---------------------------")
+  summary = HeavyHitters(counters=2)
+  summary.update(word for word in words)
+  print(summary.top(2), 'total:', summary.get_total(), 'bound:', summary.error_bound())
+  mode, frequency = summary.mode()
+  print(f"Mode : {mode}, Frequency: {frequency}")
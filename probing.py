@@ -0,0 +1,130 @@
+# Description: Probe sequence strategies for the Open Addressing HashMap.
+#              A strategy turns a hash code into the sequence of slot
+#              indices that put/get/remove walk through. Every step is
+#              computed incrementally from the previous index, so probing
+#              never pays for an exponentiation.
+
+
+def _is_power_of_two(capacity: int) -> bool:
+    """Return True if capacity is a positive power of two."""
+    return capacity > 0 and capacity & (capacity - 1) == 0
+
+
+class ProbeStrategy:
+    """
+    Base class for probe sequences.
+    Probe 0 is always the home slot hash_code % capacity; probe i + 1 is
+    next_index(index, i, step, capacity) where step is the per-key value
+    returned by step_size().
+    """
+
+    name = ''
+
+    def step_size(self, hash_code: int, capacity: int) -> int:
+        """Return the per-key step used by next_index()."""
+        return 1
+
+    def next_index(self, index: int, i: int, step: int, capacity: int) -> int:
+        """Return the index of probe i + 1 given the index of probe i."""
+        raise NotImplementedError
+
+    def coverage(self, capacity: int) -> int:
+        """
+        Return how many distinct slots are guaranteed to be visited by
+        the first capacity probes for a table of the given capacity.
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        """Override repr to show the strategy name."""
+        return f"{type(self).__name__}()"
+
+
+class LinearProbe(ProbeStrategy):
+    """
+    index, index + 1, index + 2, ...
+    Visits every slot for any capacity.
+    """
+
+    name = 'linear'
+
+    def next_index(self, index: int, i: int, step: int, capacity: int) -> int:
+        """Return the index of probe i + 1 given the index of probe i."""
+        index += 1
+        return 0 if index == capacity else index
+
+    def coverage(self, capacity: int) -> int:
+        """Every slot is visited."""
+        return capacity
+
+
+class QuadraticProbe(ProbeStrategy):
+    """
+    index + i ** 2, computed incrementally as (i + 1) ** 2 - i ** 2 = 2i + 1.
+    For a prime capacity p the first (p + 1) // 2 probes are distinct,
+    which always reaches a free slot while the load factor stays below 0.5.
+    """
+
+    name = 'quadratic'
+
+    def next_index(self, index: int, i: int, step: int, capacity: int) -> int:
+        """Return the index of probe i + 1 given the index of probe i."""
+        return (index + 2 * i + 1) % capacity
+
+    def coverage(self, capacity: int) -> int:
+        """
+        Half the table (rounded up) for prime capacities. Squares modulo a
+        power of two hit only a small fraction of the residues, so only
+        the home slot is guaranteed there.
+        """
+        return 1 if _is_power_of_two(capacity) else (capacity + 1) // 2
+
+
+class TriangularProbe(ProbeStrategy):
+    """
+    index + i * (i + 1) / 2, computed incrementally by adding i + 1.
+    Visits every slot when the capacity is a power of two; for a prime
+    capacity it gives the same (p + 1) // 2 guarantee as QuadraticProbe.
+    """
+
+    name = 'triangular'
+
+    def next_index(self, index: int, i: int, step: int, capacity: int) -> int:
+        """Return the index of probe i + 1 given the index of probe i."""
+        return (index + i + 1) % capacity
+
+    def coverage(self, capacity: int) -> int:
+        """All slots for powers of two, otherwise half (rounded up)."""
+        return capacity if _is_power_of_two(capacity) else (capacity + 1) // 2
+
+
+class DoubleHashProbe(ProbeStrategy):
+    """
+    index + i * step, where step is derived from the high part of the hash
+    code. The step is kept in 1..capacity - 1 for prime capacities and odd
+    for power-of-two capacities, so it is coprime with the capacity and
+    the sequence visits every slot in both cases.
+    """
+
+    name = 'double'
+
+    def step_size(self, hash_code: int, capacity: int) -> int:
+        """Return a step coprime with capacity."""
+        if _is_power_of_two(capacity):
+            return (hash_code // capacity) % capacity | 1
+        return 1 + (hash_code // capacity) % (capacity - 1)
+
+    def next_index(self, index: int, i: int, step: int, capacity: int) -> int:
+        """Return the index of probe i + 1 given the index of probe i."""
+        return (index + step) % capacity
+
+    def coverage(self, capacity: int) -> int:
+        """Every slot is visited for prime and power-of-two capacities."""
+        return capacity
+
+
+# Strategies by name, for choosing one from configuration or a benchmark
+PROBE_STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (LinearProbe, QuadraticProbe, TriangularProbe, DoubleHashProbe)
+}
@@ -0,0 +1,107 @@
+# Description: Versioned binary snapshot files shared by both HashMaps.
+#              A snapshot is a fixed header (magic bytes, format version and
+#              the kind of map that wrote it) followed by one pickled record
+#              holding the table's capacity and options, the identity of its
+#              hash function and the table layout as parallel columns: slot
+#              or bucket index, cached hash code, key and value per entry.
+#              Loading places every entry straight back at its recorded
+#              index, so no key is hashed again and the table never resizes.
+#              Values are pickled, so only load snapshots you trust.
+
+import gc
+import importlib
+import pickle
+import struct
+from contextlib import contextmanager
+
+MAGIC = b'HMSNAP'
+VERSION = 1
+
+# magic, format version, map kind (b'S' chaining, b'O' open addressing)
+_HEADER = struct.Struct('<6sHc')
+
+# How many entries load() re-hashes to check it was given the right function
+_HASH_CHECK_SAMPLE = 8
+
+
+def function_identity(function: callable) -> str:
+    """Return the 'module.name' string recorded for a hash function."""
+    return f"{function.__module__}.{function.__name__}"
+
+
+def write_snapshot(path: str, kind: bytes, record: dict) -> None:
+    """Write the header and the pickled record to path."""
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, kind))
+        pickle.dump(record, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_snapshot(path: str, kind: bytes) -> dict:
+    """
+    Return the record stored at path. Raises ValueError if the file is not
+    a snapshot, was written by a newer format version or by the other kind
+    of map.
+    """
+    with open(path, 'rb') as file:
+        header = file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{path} is not a HashMap snapshot")
+        magic, version, file_kind = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a HashMap snapshot")
+        if version > VERSION:
+            raise ValueError(f"snapshot format version {version} is newer than "
+                             f"the supported version {VERSION}")
+        if file_kind != kind:
+            raise ValueError(f"snapshot of kind {file_kind!r} cannot be loaded "
+                             f"into a map of kind {kind!r}")
+        return pickle.load(file)
+
+
+def resolve_hash_function(record: dict, function: callable = None) -> callable:
+    """
+    Return the hash function to load record with. A given function must
+    have the recorded identity; without one, the recorded module-level
+    function is imported.
+    """
+    identity = record['function']
+    if function is not None:
+        if function_identity(function) != identity:
+            raise ValueError(f"snapshot was written with hash function {identity}, "
+                             f"not {function_identity(function)}")
+        return function
+
+    module_name, _, name = identity.rpartition('.')
+    function = getattr(importlib.import_module(module_name), name, None)
+    if function is None:
+        raise ValueError(f"hash function {identity} cannot be imported; "
+                         f"pass it to load() explicitly")
+    return function
+
+
+@contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector while a snapshot is rebuilt. Creating
+    one node or entry per key otherwise triggers repeated collections that
+    walk the whole growing table, roughly doubling the load time.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def check_hashes(hash_function: callable, keys: list, hashes: list) -> None:
+    """
+    Re-hash the first few keys and compare against the cached hash codes,
+    catching a function that has the right name but behaves differently
+    (another seed, or a changed implementation).
+    """
+    for key, hash_code in zip(keys[:_HASH_CHECK_SAMPLE], hashes):
+        if hash_function(key) != hash_code:
+            raise ValueError("cached hash codes in the snapshot do not match "
+                             "the hash function")
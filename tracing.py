@@ -0,0 +1,231 @@
+# Description: Optional operation tracing for both HashMaps. set_tracer()
+#              shadows put/get/contains_key/remove on one map instance with
+#              wrappers that time a sample of the calls and pass a
+#              TraceEvent to a callback. Every rebuild of the table (growth,
+#              shrinking, compaction, the start of a progressive rehash) is
+#              traced too, whatever triggered it. Untraced maps keep calling
+#              the class methods directly, so tracing costs nothing until it
+#              is switched on; clearing the tracer removes the wrappers again.
+#              LatencyHistogram and TraceWriter are ready-made callbacks.
+
+import json
+import time
+from collections import namedtuple
+
+TRACED_OPERATIONS = ('put', 'get', 'contains_key', 'remove')
+
+# Methods every map rebuilds its table through: _rehash(new_capacity) moves
+# all entries into a new array at once, _start_migration(new_capacity)
+# installs one for a progressive rehash
+TRACED_REBUILDS = ('_rehash', '_start_migration')
+
+# op: one of TRACED_OPERATIONS, or 'resize', 'compact' (rehash at the same
+# capacity) or 'migrate' (start of a progressive rehash) for a rebuild;
+# key: the key passed in (None for a rebuild); index: bucket (SC) or home
+# slot (OA) of the key after the call; length: chain length (SC) or number
+# of probes to the key or the first empty slot (OA); seconds: elapsed time
+# of the call, including any rebuild it triggered (which is also reported
+# on its own, first); size, capacity: the map's state after the call
+TraceEvent = namedtuple('TraceEvent', 'op key index length seconds size capacity')
+
+
+def set_tracer(hash_map, callback: callable = None, sample_rate: float = 1.0) -> None:
+    """
+    Trace one call in every round(1 / sample_rate) calls of each operation
+    on hash_map, and every rebuild of its table, by passing a TraceEvent to
+    callback, or stop tracing if callback is None. The map must provide
+    _trace_position(key) returning (index, length) for a key.
+    """
+    for name in TRACED_OPERATIONS + TRACED_REBUILDS:
+        hash_map.__dict__.pop(name, None)
+    if callback is None:
+        return
+    if not 0 < sample_rate <= 1:
+        raise ValueError("sample_rate must be in (0, 1]")
+
+    every = max(1, round(1 / sample_rate))
+    for op in TRACED_OPERATIONS:
+        method = getattr(type(hash_map), op).__get__(hash_map)
+        setattr(hash_map, op, _traced(hash_map, op, method, callback, every))
+    for name in TRACED_REBUILDS:
+        method = getattr(type(hash_map), name).__get__(hash_map)
+        setattr(hash_map, name, _traced_rebuild(hash_map, name, method, callback))
+
+
+def _traced(hash_map, op: str, method, callback: callable, every: int):
+    """Return a wrapper around a bound map method that traces every Nth call."""
+    clock = time.perf_counter
+    countdown = every
+
+    def wrapper(*args):
+        nonlocal countdown
+        countdown -= 1
+        if countdown:
+            return method(*args)
+        countdown = every
+
+        start = clock()
+        result = method(*args)
+        seconds = clock() - start
+        key = args[0]
+        index, length = hash_map._trace_position(key)
+        callback(TraceEvent(op, key, index, length, seconds,
+                            hash_map.get_size(), hash_map.get_capacity()))
+        return result
+
+    wrapper.__name__ = op
+    return wrapper
+
+
+def _traced_rebuild(hash_map, name: str, method, callback: callable):
+    """Return a wrapper around a bound rebuild method that traces every call."""
+    clock = time.perf_counter
+
+    def wrapper(new_capacity: int) -> None:
+        old_capacity = hash_map.get_capacity()
+        start = clock()
+        method(new_capacity)
+        seconds = clock() - start
+        if name == '_start_migration':
+            op = 'migrate'
+        elif hash_map.get_capacity() == old_capacity:
+            op = 'compact'
+        else:
+            op = 'resize'
+        callback(TraceEvent(op, None, None, None, seconds,
+                            hash_map.get_size(), hash_map.get_capacity()))
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+class LatencyHistogram:
+    """
+    Callback that counts trace events per operation in power-of-two
+    microsecond latency buckets and chain/probe length buckets
+    """
+
+    def __init__(self) -> None:
+        """Start with empty histograms."""
+        self.latency = {}
+        self.length = {}
+        self.slowest = {}
+
+    def __call__(self, event: TraceEvent) -> None:
+        """Add one event to the histograms."""
+        micros = int(event.seconds * 1e6)
+        bucket = 1 << micros.bit_length() if micros else 0
+        latency = self.latency.setdefault(event.op, {})
+        latency[bucket] = latency.get(bucket, 0) + 1
+        if event.length is not None:
+            lengths = self.length.setdefault(event.op, {})
+            lengths[event.length] = lengths.get(event.length, 0) + 1
+        if event.seconds > self.slowest.get(event.op, (0.0,))[0]:
+            self.slowest[event.op] = (event.seconds, event.key)
+
+    def summary(self) -> dict:
+        """
+        Return {op: {'latency_us': {upper bound: count}, 'length': {length:
+        count}, 'slowest': (seconds, key)}} with buckets in ascending order
+        """
+        return {
+            op: {
+                'latency_us': dict(sorted(self.latency[op].items())),
+                'length': dict(sorted(self.length.get(op, {}).items())),
+                'slowest': self.slowest.get(op),
+            }
+            for op in self.latency
+        }
+
+
+class TraceWriter:
+    """Callback that writes every trace event as one JSON line to a file."""
+
+    def __init__(self, path: str) -> None:
+        """Open path for writing, replacing any existing file."""
+        self._file = open(path, 'w')
+
+    def __call__(self, event: TraceEvent) -> None:
+        """Write one event."""
+        self._file.write(json.dumps(event._asdict(), default=repr) + '\n')
+
+    def close(self) -> None:
+        """Flush and close the trace file."""
+        self._file.close()
+
+    def __enter__(self) -> "TraceWriter":
+        """Support use as a context manager that closes the file."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the file on leaving the with block."""
+        self.close()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+  import os
+  import tempfile
+
+  from a6_include import hash_function_1, hash_function_2
+  import hash_map_oa
+  import hash_map_sc
+
+  print("\nSampled operations and every resize, SC")
+  print("---------------------------------------")
+  m = hash_map_sc.HashMap(11, hash_function_1)
+  histogram = LatencyHistogram()
+  m.set_tracer(histogram, sample_rate=0.25)
+  for i in range(100):
+    m.put('key' + str(i), i)
+  for i in range(40):
+    m.get('key' + str(i))
+    m.contains_key('key' + str(i))
+  summary = histogram.summary()
+  counts = {op: sum(summary[op]['latency_us'].values()) for op in summary}
+  print(counts, m.get_stats()['resize_count'])
+  result = counts['put'] == 25 and counts['get'] == 10 and counts['contains_key'] == 10
+  result &= counts['resize'] == m.get_stats()['resize_count']
+  result &= sum(summary['get']['length'].values()) == 10
+  print(result)
+
+  print("\nCompaction and progressive rehash events, OA")
+  print("--------------------------------------------")
+  m = hash_map_oa.HashMap(11, hash_function_2, progressive=True)
+  events = []
+  m.set_tracer(events.append, sample_rate=1 / 1000)
+  for i in range(50):
+    m.put('key' + str(i), i)
+  for i in range(200):
+    m.put('temp' + str(i), i)
+    m.remove('temp' + str(i))
+  m.compact()
+  ops = [event.op for event in events]
+  stats = m.get_stats()
+  print(ops.count('migrate'), ops.count('compact'), ops.count('put'), ops.count('remove'))
+  result = ops.count('migrate') == stats['resize_count']
+  result &= ops.count('compact') == stats['compaction_count'] >= 2
+  result &= all(event.key is None and event.capacity == m.get_capacity()
+                for event in events if event.op == 'compact')
+  print(result)
+
+  print("\nTraceWriter and removing the tracer")
+  print("-----------------------------------")
+  path = os.path.join(tempfile.mkdtemp(), 'trace.jsonl')
+  m = hash_map_oa.HashMap(11, hash_function_1)
+  with TraceWriter(path) as writer:
+    m.set_tracer(writer)
+    m.put('key1', 10)
+    m.get('key1')
+    m.contains_key('key2')
+    m.set_tracer(None)
+    m.put('key2', 20)
+    m.resize_table(100)
+  with open(path) as trace_file:
+    lines = [json.loads(line) for line in trace_file]
+  print([(line['op'], line['key'], line['size']) for line in lines])
+  result = [line['op'] for line in lines] == ['put', 'get', 'contains_key']
+  result &= all(name not in m.__dict__ for name in TRACED_OPERATIONS + TRACED_REBUILDS)
+  print(result)